@@ -1,40 +1,171 @@
+import time
+STARTED = time.perf_counter()  # before the other imports, they are the first phase of the startup profile
+
+import asyncio
 import json
+import math
+import os
 from sys import version
 from typing import Literal
 
 import discord
+import yarl
 from discord.ext import commands
+from discord.gateway import DiscordWebSocket
+
+from utils.framedata import FrameDataStore, Reload
+from utils.logs import ChannelLog, ErrorReporter
+from utils.memory import cache_options
+from utils.metrics import Metrics
+from utils.ratelimit import RateLimits
+from utils.startup import StartupProfile
 
 print(f'Python {version}\n'
       f'discord.py {discord.__version__} | ')
 
+# Set by utils.cluster when this process is one worker of a cluster, otherwise a single shard
+CLUSTER_ID = os.environ.get('SSF2_CLUSTER_ID')
+SHARD_IDS = [int(shard) for shard in os.environ['SSF2_SHARD_IDS'].split(',')] if CLUSTER_ID else None
+SHARD_COUNT = int(os.environ.get('SSF2_SHARD_COUNT', 1))
+# No member chunking, member/user cache or message cache, see utils/memory.py
+LOW_MEMORY = os.environ.get('SSF2_LOW_MEMORY', '') not in ('', '0')
+# Set by utils.startup to collect the startup profile of a run
+STARTUP_REPORT = os.environ.get('SSF2_STARTUP_REPORT')
+EXIT_AFTER_STARTUP = bool(os.environ.get('SSF2_EXIT_AFTER_STARTUP'))
+# Points the bot at the stand-in gateway of utils.gateway instead of Discord
+if os.environ.get('SSF2_API'):
+    discord.http.Route.BASE = f"{os.environ['SSF2_API']}/api/v10"
+    DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(os.environ['SSF2_GATEWAY'])
 
-class MyBot(commands.Bot):
 
-    def __init__(self, *, intents: discord.Intents):
+class MyBot(commands.AutoShardedBot):
+
+    def __init__(self, *, low_memory: bool = False, shard_ids: list = None, shard_count: int = 1):
         super().__init__(
             activity=discord.CustomActivity(name='Krystal just added!'),
             command_prefix=commands.when_mentioned,
-            intents=intents
+            shard_ids=shard_ids,
+            shard_count=shard_count,
+            **cache_options(low_memory)
         )
-    
+        self.command_log = None
+        self.errors = None
+        # Work on shared files (the snapshot, the media mirror) is done by one process only
+        self.primary = CLUSTER_ID in (None, '0')
+        self.metrics = Metrics()
+        self.rate_limits = RateLimits()
+        self.startup = StartupProfile(STARTED)
+        self.startup.record('imports', STARTED)
+        self.preloads = []
+        self.framedata_loaded = None
+        self.login_started = self.connect_started = None
+
+    def preload(self, name: str, fn, *args) -> asyncio.Task:
+        '''Runs fn in a thread while startup carries on, the bot is only reported ready once it is done'''
+        task = asyncio.create_task(self.startup.preload(name, fn, *args))
+        self.preloads.append(task)
+        return task
+
+    async def login(self, token: str):
+        # The frame data loads while the login requests are in flight
+        self.framedata_loaded = self.preload('framedata', FrameDataStore().load)
+        self.login_started = time.perf_counter()
+        await super().login(token)
+
+    async def connect(self, *, reconnect: bool = True):
+        self.connect_started = time.perf_counter()
+        await super().connect(reconnect=reconnect)
+
     async def setup_hook(self):
+        self.startup.record('login', self.login_started)
+        # Command usage is queued and posted in batches instead of once per interaction
+        self.command_log = ChannelLog(self, keys['COMMANDLOG'])
+        self.command_log.start()
+        # Errors are counted by fingerprint and reported once a minute, not once per occurrence
+        self.errors = ErrorReporter(ChannelLog(self, keys['ERRORLOG'], batch_size=5))
+        self.errors.log.start()
+        self.errors.start()
+        self.tree.on_error = self.on_app_command_error
+        self.tree.interaction_check = self.check_rate_limit
+        # Loaded once, off the event loop, before any cog can use it
+        self.framedata = await self.framedata_loaded
+        print(f'Loaded frame data for {len(self.framedata.movesets)} characters '
+              f'({len(self.framedata)} hits) in {self.framedata.load_time * 1000:.0f} ms...')
         cogs = [
             'hitboxes',  # Frame data and hitbox commands
             'info',      # Links and info commands
 #            'servers',   # Links region servers
             'stats',     # Gives info about character stats
+            'search',    # Searches frame data across the roster
+            'reload',    # Hot reloads frame data when the data folder changes
+            'metrics',   # Latency histograms and counters
+            'mirror',    # Mirrors embed images and reports dead links
 #            'faq'        # Answers commonly asked questions about the bot
         ]
+        if CLUSTER_ID is not None:
+            cogs.append('cluster')  # Heartbeats for the cluster launcher
         for cog in cogs:
-            await self.load_extension(f'cogs.{cog}')
+            with self.startup.phase(f'cog {cog}'):
+                await self.load_extension(f'cogs.{cog}')
             print(f'Loaded {cog} cog...')
         print(f'Logged in as {bot.user}\nUser ID: {bot.user.id}')
 
+    async def on_ready(self):
+        if self.startup.ready is not None:  # Fires again after a full reconnect
+            return
+        self.startup.record('gateway', self.connect_started)
+        # The preloads had the whole gateway connection to finish in
+        await asyncio.gather(*self.preloads)
+        self.startup.mark_ready()
+        for phase in self.startup.phases:
+            self.metrics.observe('startup_phase_seconds', phase.duration, phase=phase.name)
+        self.metrics.observe('startup_seconds', self.startup.ready)
+        print('\n'.join(self.startup.report()))
+        if self.startup.over_budget:
+            print(f'Startup took {self.startup.ready:.1f} s, over the {self.startup.budget:.0f} s budget')
+            self.metrics.count('startup_over_budget_total')
+        if STARTUP_REPORT:
+            with open(STARTUP_REPORT, 'w') as f:
+                json.dump(self.startup.to_dict(), f)
+        if EXIT_AFTER_STARTUP:
+            await self.close()
+
+    async def close(self):
+        # Flush queued logs while the HTTP session is still open
+        if self.errors:
+            await self.errors.close()
+            await self.errors.log.close()
+        if self.command_log:
+            await self.command_log.close()
+        await super().close()
+
+    async def on_app_command_error(self, interaction: discord.Interaction, error: discord.app_commands.AppCommandError):
+        error = getattr(error, 'original', error)
+        command = interaction.command.name if interaction.command else 'unknown'
+        self.metrics.count('command_errors_total', command=command, error=type(error).__name__)
+        self.errors.report(error, f"/{command} in '{interaction.guild}'")
+
+    async def check_rate_limit(self, interaction: discord.Interaction) -> bool:
+        '''Answers with a "slow down" when the user or guild is out of tokens, see utils/ratelimit.py'''
+        if interaction.type is discord.InteractionType.autocomplete:
+            return True  # every keystroke, and nothing is shown for them anyway
+        kind = 'button' if interaction.type is discord.InteractionType.component else 'command'
+        wait, scope = self.rate_limits.take(kind, interaction.user.id, interaction.guild_id)
+        if not wait:
+            return True
+        self.metrics.count('rate_limited_total', kind=kind, scope=scope)
+        who = "You're" if scope == 'user' else 'This server is'
+        await interaction.response.send_message(
+            f'{who} using the bot too fast, try again in {math.ceil(wait)} s.', ephemeral=True)
+        return False
+
+    def swap_framedata(self, reload: Reload):
+        # A single reference swap: commands see either the old or the new store, never a mix
+        self.framedata = reload.store
+        self.dispatch('framedata_reload', reload)
+
 
-intents = discord.Intents.default()
-intents.members = True
-bot = MyBot(intents=intents)
+bot = MyBot(low_memory=LOW_MEMORY, shard_ids=SHARD_IDS, shard_count=SHARD_COUNT)
 bot.remove_command('help')
 
 # Sync commands
@@ -78,17 +209,15 @@ async def fakenews(ctx):
 # Event logging    
 @bot.event
 async def on_command_error(ctx, error):
-    err_log_channel = await bot.fetch_channel(keys['ERRORLOG'])
     error = getattr(error, 'original', error)
-    error_message = str(error)
-    if err_log_channel:
-        await err_log_channel.send(error_message)
+    bot.metrics.count('command_errors_total', command=str(ctx.command), error=type(error).__name__)
+    bot.errors.report(error, f"'{ctx.message.content[:100]}' in '{ctx.guild}'")
 
 @bot.event
 async def on_interaction(interaction: discord.Interaction):
-    cmd_log_channel = await bot.fetch_channel(keys['COMMANDLOG'])
-    if cmd_log_channel:
-        await cmd_log_channel.send(f"Slash command '{interaction.command.name}' used  in '{interaction.guild}'")
+    # Buttons and autocomplete are interactions too, only log slash commands
+    if interaction.type is discord.InteractionType.application_command and interaction.command:
+        bot.command_log.log(f"Slash command '{interaction.command.name}' used  in '{interaction.guild}'")
         
 # Bot login
 with open('KEYS.json', 'r') as f:
@@ -0,0 +1,58 @@
+import asyncio
+import json
+import math
+import os
+import time
+from pathlib import Path
+
+from discord.ext import commands, tasks
+
+HEARTBEAT_SECONDS = 5
+
+
+def write_heartbeat(path: Path, state: dict):
+    # Write then rename, so the launcher never reads a half-written file
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(json.dumps(state))
+    os.replace(tmp, path)
+
+
+class ClusterHeartbeat(commands.Cog):
+    """Report the health of this worker's shards to the cluster launcher."""
+
+    def __init__(self, bot: commands.Bot, path: Path):
+        self.bot = bot
+        self.path = path
+
+    async def cog_load(self):
+        # Started before login, a worker stuck connecting still reports that it's alive
+        self.heartbeat.start()
+
+    async def cog_unload(self):
+        self.heartbeat.cancel()
+
+    def state(self) -> dict:
+        shards = {}
+        for shard_id, shard in self.bot.shards.items():
+            latency = shard.latency
+            shards[shard_id] = {
+                'latency': latency if math.isfinite(latency) else None,
+                'closed': shard.is_closed(),
+            }
+        return {
+            'cluster': os.environ.get('SSF2_CLUSTER_ID'),
+            'pid': os.getpid(),
+            'time': time.time(),
+            'ready': self.bot.is_ready(),
+            'guilds': len(self.bot.guilds),
+            'shards': shards,
+        }
+
+    @tasks.loop(seconds=HEARTBEAT_SECONDS)
+    async def heartbeat(self):
+        await asyncio.to_thread(write_heartbeat, self.path, self.state())
+
+
+async def setup(bot: commands.Bot):
+    # Only loaded by bot.py when it runs as a cluster worker
+    await bot.add_cog(ClusterHeartbeat(bot, Path(os.environ['SSF2_HEARTBEAT'])))
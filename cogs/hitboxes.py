@@ -1,697 +1,425 @@
-import json
-from typing import Literal
+import asyncio
+import re
 import discord
 from discord import app_commands
 from discord.ui import Button, View
 from discord.ext import commands
 
+from utils.autocomplete import NameIndex
+from utils.embeds import HitboxEmbeds
+from utils.framedata import Reload
+from utils.media import MediaStore
+from utils.mirror import Mirror
+
 ### Buttons ###
 
 class HitboxView(View):
-    def __init__(self, embeds, gif_pairs, hits, user: discord.User):
-        super().__init__()
-        self.embeds = embeds  # list of discord.Embed objects
-        self.gif_pairs = gif_pairs  # list of tuples: (fullspeed_url, slowmo_url)
-        self.hits = hits
-        self.current_hit = 0
-        self.user = user
+    '''
+    HitboxView
+
+        Holds no state of its own: the character, move, hit and user are written into the
+        custom_id of every button and read back by HitboxButton when it is pressed. Views
+        never time out, aren't kept in memory after sending, and keep working after a restart.
+    '''
+
+    def __init__(self, embeds: HitboxEmbeds, char: str, move: str, hit: int, user_id: int):
+        super().__init__(timeout=None)
+        self.embeds = embeds
+        self.char = char
+        self.move = move
+        self.hit = hit
+        char_id, move_id = embeds.data.registry.get(char).id, embeds.data.moves[move]
 
         # GIF Speed Buttons
-        self.add_item(GIFSpeedToggle("Full Speed", True, self))
-        self.add_item(GIFSpeedToggle("Slow", False, self))
-        
-        # Hit buttons
-        for idx, embed in enumerate(embeds):
-            hit_name = hits[idx] if hits[idx] else f"Hit {idx+1}"
-            if len(hits)>1: self.add_item(MoveSelect(hit_name, idx, self))
+        self.add_item(HitboxButton("Full Speed", discord.ButtonStyle.blurple, 's', char_id, move_id, hit, False, user_id))
+        self.add_item(HitboxButton("Slow", discord.ButtonStyle.blurple, 's', char_id, move_id, hit, True, user_id))
 
-    def get_current_embed(self):
-        return self.embeds[self.current_hit]
+        # Hit buttons
+        hits = embeds.data.move(char, move)
+        if len(hits) > 1:
+            for idx, hit in enumerate(hits):
+                hit_name = hit.name if hit.name else f"Hit {idx+1}"
+                self.add_item(HitboxButton(hit_name, discord.ButtonStyle.gray, 'h', char_id, move_id, idx, False, user_id))
+
+    def get_current(self, slowmo: bool = False) -> tuple:
+        '''(embed, attachments), the embed a fresh copy every time, the cached payload is never modified'''
+        embed, file = self.embeds.render(self.char, self.move, self.hit, slowmo)
+        # Empty when the gif is a url, which also removes the gif of the previous hit
+        return embed, [file] if file else []
+
+class HitboxButton(discord.ui.DynamicItem[Button], template=r'hitbox:(?P<kind>[sh]):(?P<char>\d+):(?P<move>\d+):(?P<hit>\d+):(?P<slowmo>[01]):(?P<user>\d+)'):
+    '''
+    A speed ('s') or hit ('h') button, custom_id = hitbox:{kind}:{character id}:{move id}:{hit}:{slowmo}:{user id}
 
-    def get_current_gif(self, slowmo: bool):
-        urls = self.gif_pairs[self.current_hit]
-        return urls[1] if slowmo else urls[0]
+        Character ids are the ones in characters.json and move ids the ones in moves.json,
+        both well under discord's 100 character limit.
+    '''
 
-class GIFSpeedToggle(Button):
-    def __init__(self, name: str, is_fullspeed: bool, view: HitboxView):
-        self.is_fullspeed = is_fullspeed
-        self.custom_view = view
-        style = discord.ButtonStyle.blurple
-        super().__init__(label=name, style=style)
+    def __init__(self, label: str, style: discord.ButtonStyle, kind: str, char_id: int, move_id: int, hit: int, slowmo: bool, user_id: int):
+        self.kind = kind
+        self.char_id = char_id
+        self.move_id = move_id
+        self.hit = hit
+        self.slowmo = slowmo
+        self.user_id = user_id
+        custom_id = f'hitbox:{kind}:{char_id}:{move_id}:{hit}:{int(slowmo)}:{user_id}'
+        super().__init__(Button(label=label, style=style, custom_id=custom_id))
 
-    async def callback(self, interaction: discord.Interaction):
-        if interaction.user != self.custom_view.user:
-            await interaction.response.send_message("You're not allowed to use this button.", ephemeral=True)
-            return
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: Button, match: re.Match):
+        return cls(item.label, item.style, match['kind'], int(match['char']), int(match['move']),
+                   int(match['hit']), match['slowmo'] == '1', int(match['user']))
 
-        idx = self.custom_view.current_hit
-        embed = self.custom_view.get_current_embed()
-        embed.set_image(url=self.custom_view.get_current_gif(slowmo=not self.is_fullspeed))
-        await interaction.response.edit_message(embed=embed, view=self.custom_view)
-        
-class MoveSelect(Button):
-    def __init__(self, name: str, index: int, view: HitboxView):
-        self.index = index
-        self.custom_view = view
-        super().__init__(label=name, style=discord.ButtonStyle.gray)
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return await interaction.client.check_rate_limit(interaction)
 
     async def callback(self, interaction: discord.Interaction):
-        if interaction.user != self.custom_view.user:
+        if interaction.user.id != self.user_id:
             await interaction.response.send_message("You're not allowed to use this button.", ephemeral=True)
             return
 
-        self.custom_view.current_hit = self.index
-        embed = self.custom_view.get_current_embed()
-        # Set default image to full speed
-        embed.set_image(url=self.custom_view.get_current_gif(slowmo=False))
-        await interaction.response.edit_message(embed=embed, view=self.custom_view)
-
-def ssf2_hitbox(char: str, move: str, user: discord.User):
+        button = 'speed' if self.kind == 's' else 'hit'
+        metrics = interaction.client.metrics
+        metrics.count('button_clicks_total', button=button)
+        with metrics.time('button_stage_seconds', button=button, stage='embed'):
+            # Always the current data, a reload since the message was sent is picked up here
+            embeds = interaction.client.get_cog('Hitboxes').embeds
+            character = embeds.data.registry.characters.get(self.char_id)
+            char, move = character and character.info, embeds.data.move_name(self.move_id)
+            if not embeds.data.hits.get((char, move)) or self.hit >= len(embeds.data.hits[(char, move)]):
+                await interaction.response.send_message("This move has changed since, use the command again.", ephemeral=True)
+                return
+            view = HitboxView(embeds, char, move, self.hit, self.user_id)
+            embed, attachments = view.get_current(self.slowmo)
+        with metrics.time('button_stage_seconds', button=button, stage='edit'):
+            await interaction.response.edit_message(embed=embed, view=view, attachments=attachments)
+
+def ssf2_hitbox(embeds: HitboxEmbeds, char: str, move: str, user: discord.User):
     '''
     ssf2_hitbox
     
-        inputs: character, move, user
-        output: a tuple of discord embeds, each element of the tuple being a different hit of the specified move
+        inputs: embed cache, character, move, user
+        output: the embed for the first hit of the specified move, the local gif it attaches (if any),
+                and the view used to switch hits and gif speed
 
-        Loads two different json files and extracts information from the json files
-        Information from characters.json is used to supply the icon and color of the embed
+        Embeds are built from the frame data store and memoized by HitboxEmbeds
+        The character registry supplies the icon and color of the embed
         Information from {char}.json is used to supply the image, description, and title of the embed
         
     '''
     
-    
-    with open('data/characters.json', 'r') as c:
-        charidentifier = json.load(c)
+    view = HitboxView(embeds, char, move, 0, user.id)
+    embed, files = view.get_current()
+    return embed, files, view
 
-    with open(f'data/info/{char}.json', 'r') as f:
-        charinfo = json.load(f)
-    
-    embeds = []
-    gif_pairs = []  # (fullspeed_url, slowmo_url)
-    hits = []
-
-    # Move info for embed description    
-    for i, hit in enumerate(charinfo[move]["Hitboxes"]):
-        # Iterates through the different hits the move has
-        hits.append(hit)
-         
-    # Move info for embed description    
-    for i, hit in enumerate(charinfo[move]["Hitboxes"]):
-        # Iterates through the different hits the move has
-        
-        # For every value listed in each hit adds the the information about the move
-        # e.g. desc += damage: 2%
-        desc = ""
-        for idx, info in enumerate(charinfo[move]["Hitboxes"][f'{hit}']):
-            desc += f'{info}: {charinfo[move]["Hitboxes"][f"{hit}"][f"{info}"]}\n'
-            
-        embed = discord.Embed(description=f'```\n{desc}```', color=int(charidentifier[char]["color"], 16))
-        # If there are multiple hits then the embed title will specify the hit
-        if len(hits)>1:
-            hit_text = f" ({hit})"
-        else:
-            hit_text = ""
-        embed.set_author(name=f'{char} {move}{hit_text}', icon_url=charidentifier[char]["icon"])
-        embed.set_footer(text='Up to date as of patch 1.4.0.1')
-        embed.set_image(url=f'{charinfo[move]["Images"]["Full Speed"][f"{hit}"]}')  # Default to fullspeed       
-    
-        embeds.append(embed)
-        gif_pairs.append((f'{charinfo[move]["Images"]["Full Speed"][f"{hit}"]}', f'{charinfo[move]["Images"]["Slowmo"][f"{hit}"]}'))  # (fullspeed, slowmo)
-    
-    view = HitboxView(embeds, gif_pairs, hits, user)        
-    return embeds, view 
+def move_indexes(data) -> dict:
+    '''Character id -> autocomplete index over the moves of that character which have hitboxes'''
+    return {
+        character.id: NameIndex(move for move in data.movesets[character.info] if data.hits[(character.info, move)])
+        for character in data.registry if character.info
+    }
 
 class Hitboxes(commands.Cog):
     """Send displays of frame data, character, and hitbox info."""
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        # Local gifs are only used for hits without a url or with a dead one
+        self.embeds = HitboxEmbeds(bot.framedata, media=MediaStore().load(), mirror=Mirror().load())
+        self.moves = move_indexes(bot.framedata)
+
+    async def cog_load(self):
+        # Every command is named after its character, e.g. /chibirobo for ChibiRobo
+        for command in self.get_app_commands():
+            character = self.bot.framedata.registry.get(command.name)
+            if character is None or character.info is None:
+                print(f'Character names: /{command.name} has no frame data')
+        # Buttons of every message ever sent, including those from before a restart
+        self.bot.add_dynamic_items(HitboxButton)
+        # Build the first hit of every move while the gateway connects, so commands only do a
+        # cache lookup. Anything requested before it is done is built on demand.
+        self.bot.preload('hitbox embeds', self.embeds.warm)
+
+    async def cog_unload(self):
+        self.bot.remove_dynamic_items(HitboxButton)
+
+    @commands.Cog.listener()
+    async def on_framedata_reload(self, reload: Reload):
+        # Buttons look up the cog's cache when pressed, so every message switches over
+        self.embeds = self.embeds.rebased(reload)
+        self.moves = move_indexes(reload.store)
+        await asyncio.to_thread(self.embeds.warm)
+
+    @commands.Cog.listener()
+    async def on_mirror_update(self, mirror: Mirror):
+        # Dead or failing links change which hits attach a file, so every embed is rebuilt
+        embeds = self.embeds
+        self.embeds = HitboxEmbeds(embeds.data, embeds.cache.maxsize, embeds.media, mirror)
+        await asyncio.to_thread(self.embeds.warm)
+
+    @commands.command()
+    @commands.is_owner()
+    async def embedcache(self, ctx: commands.Context):
+        """Show hit/miss/eviction counters of the hitbox embed cache"""
+        stats = self.embeds.stats()
+        await ctx.send('```ml\n' + '\n'.join(f'{k}: {v:,}' for k, v in stats.items()) + '```')
+
+    async def move_autocomplete(self, interaction: discord.Interaction, current: str):
+        character = self.embeds.data.registry.get(interaction.command.name)
+        index = self.moves.get(character.id) if character else None
+        if index is None:
+            return []
+        return [app_commands.Choice(name=move, value=move) for move in index.search(current)]
+
+    async def send_hitbox(self, interaction: discord.Interaction, attack: str):
+        embeds = self.embeds
+        metrics = self.bot.metrics
+        command = interaction.command.name
+        with metrics.time('command_stage_seconds', command=command, stage='lookup'):
+            character = embeds.data.registry.get(command)
+            char = character.info if character else None
+            # The attack is typed freely, autocomplete only suggests valid moves
+            found = bool(embeds.data.hits.get((char, attack)))
+        if not found:
+            name = character.name if character else command
+            await interaction.response.send_message(f"{name} doesn't have a move called '{attack}'.", ephemeral=True)
+            return
+        with metrics.time('command_stage_seconds', command=command, stage='embed'):
+            ssf2_embed, files, view = ssf2_hitbox(embeds, char, attack, interaction.user)
+        with metrics.time('command_stage_seconds', command=command, stage='send'):
+            await interaction.response.send_message(embed=ssf2_embed, view=view, files=files)
 
     # Bandana Dee
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw'
-    ]
-
     @app_commands.command(name='bandanadee')
-    async def bandanadee(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def bandanadee(self, interaction: discord.Interaction, attack: str):
         """Bandana Dee frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Bandana Dee', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
     
     # Captain Falcon
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw'
-    ]
-
     @app_commands.command(name='captainfalcon')
-    async def captainfalcon(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def captainfalcon(self, interaction: discord.Interaction, attack: str):
         """Captain Falcon frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Captain Falcon', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
     
     # Chibi-Robo
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw'
-    ]
-
     @app_commands.command(name='chibirobo')
-    async def chibirobo(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def chibirobo(self, interaction: discord.Interaction, attack: str):
         """Chibi-Robo frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('ChibiRobo', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
     
     # Donkey Kong
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw'
-    ]
-
     @app_commands.command(name='donkeykong')
-    async def donkeykong(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def donkeykong(self, interaction: discord.Interaction, attack: str):
         """Donkey Kong frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Donkey Kong', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
         
     # Ganondorf
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw'
-    ]
-
     @app_commands.command(name='ganondorf')
-    async def ganondorf(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def ganondorf(self, interaction: discord.Interaction, attack: str):
         """Ganondorf frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Ganondorf', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
 
     # Goku
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw'
-    ]
-
     @app_commands.command(name='goku')
-    async def goku(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def goku(self, interaction: discord.Interaction, attack: str):
         """Goku frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Goku', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
     
     # Ichigo
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw'
-    ]
-
     @app_commands.command(name='ichigo')
-    async def ichigo(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def ichigo(self, interaction: discord.Interaction, attack: str):
         """Ichigo frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Ichigo', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
 
     # Isaac
         
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw'
-    ]
-
     @app_commands.command(name='isaac')
-    async def isaac(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def isaac(self, interaction: discord.Interaction, attack: str):
         """Isaac frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Isaac', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
 
     # Jigglypuff
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw'
-    ]
-
     @app_commands.command(name='jigglypuff')
-    async def jigglypuff(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def jigglypuff(self, interaction: discord.Interaction, attack: str):
         """Jigglypuff frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Jigglypuff', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
     
     # Kirby
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw'
-    ]
-
     @app_commands.command(name='kirby')
-    async def kirby(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def kirby(self, interaction: discord.Interaction, attack: str):
         """Kirby frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Kirby', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
         
     # Krystal
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw'
-    ]
-
     @app_commands.command(name='krystal')
-    async def krystal(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def krystal(self, interaction: discord.Interaction, attack: str):
         """Krystal frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Krystal', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
 
     # Link
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air', 'Z Aerial',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw'
-    ]   
-    
     @app_commands.command(name='link')
-    async def link(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def link(self, interaction: discord.Interaction, attack: str):
         """Link frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Link', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
 
     # Lloyd
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw'
-    ]   
-    
     @app_commands.command(name='lloyd')
-    async def link(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def lloyd(self, interaction: discord.Interaction, attack: str):
         """Lloyd frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Lloyd', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
         
     # Lucario
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw'
-    ]   
-    
     @app_commands.command(name='lucario')
-    async def lucario(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def lucario(self, interaction: discord.Interaction, attack: str):
         """Lucario frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Lucario', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
 
     # Luffy
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw'
-    ]   
-    
     @app_commands.command(name='luffy')
-    async def luffy(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def luffy(self, interaction: discord.Interaction, attack: str):
         """Luffy frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Luffy', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
 
     # Luigi
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw',
-        'Taunt'
-    ]   
-   
     @app_commands.command(name='luigi')
-    async def luigi(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def luigi(self, interaction: discord.Interaction, attack: str):
         """Luigi frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Luigi', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
 
     # Mario
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw'
-    ]   
-    
     @app_commands.command(name='mario')
-    async def mario(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def mario(self, interaction: discord.Interaction, attack: str):
         """Mario frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Mario', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
         
     # Marth
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw'
-    ]   
-    
     @app_commands.command(name='marth')
-    async def marth(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def marth(self, interaction: discord.Interaction, attack: str):
         """Marth frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Marth', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
         
     # Mr. Game and Watch
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw'
-    ]
-
     @app_commands.command(name='mrgameandwatch')
-    async def mrgameandwatch(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def mrgameandwatch(self, interaction: discord.Interaction, attack: str):
         """Mr. Game and Watch frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Mr Game and Watch', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
         
     # Naruto
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw'
-    ]
-
     @app_commands.command(name='naruto')
-    async def naruto(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def naruto(self, interaction: discord.Interaction, attack: str):
         """Naruto frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Naruto', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
         
     # PAC-MAN
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw'
-    ]
-
     @app_commands.command(name='pacman')
-    async def pacman(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def pacman(self, interaction: discord.Interaction, attack: str):
         """PAC-MAN frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('PAC-MAN', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
 
     # Pichu
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw'
-    ]
-
     @app_commands.command(name='pichu')
-    async def pichu(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def pichu(self, interaction: discord.Interaction, attack: str):
         """Pichu frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Pichu', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
 
     # Pit
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw'
-    ]
-
     @app_commands.command(name='pit')
-    async def pit(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def pit(self, interaction: discord.Interaction, attack: str):
         """Pit frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Pit', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
 
     # Samus
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air', 'Z Aerial',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw'
-    ]   
-    
     @app_commands.command(name='samus')
-    async def samus(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def samus(self, interaction: discord.Interaction, attack: str):
         """Samus frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Samus', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)    
+        await self.send_hitbox(interaction, attack)
         
     # Sandbag
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw',
-        'Taunt'
-    ]   
-    
     @app_commands.command(name='sandbag')
-    async def sandbag(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def sandbag(self, interaction: discord.Interaction, attack: str):
         """Sandbag frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Sandbag', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
 
     # Simon
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw',
-        'Taunt'
-    ]   
-    
     @app_commands.command(name='simon')
-    async def simon(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def simon(self, interaction: discord.Interaction, attack: str):
         """Simon frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Simon', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
 
     # Sonic
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw'
-    ]   
-    
     @app_commands.command(name='sonic')
-    async def sonic(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def sonic(self, interaction: discord.Interaction, attack: str):
         """Sonic frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Sonic', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
 
     # Sora
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw'
-    ]   
-    
     @app_commands.command(name='sora')
-    async def sora(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def sora(self, interaction: discord.Interaction, attack: str):
         """Sora frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Sora', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
 
     # Tails
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw'
-    ]   
-    
     @app_commands.command(name='tails')
-    async def tails(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def tails(self, interaction: discord.Interaction, attack: str):
         """Tails frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Tails', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
 
     # Waluigi
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw'
-    ]   
-    
     @app_commands.command(name='waluigi')
-    async def waluigi(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def waluigi(self, interaction: discord.Interaction, attack: str):
         """Waluigi frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Waluigi', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
         
     # Wario
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw'
-    ]   
-    
     @app_commands.command(name='wario')
-    async def wario(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def wario(self, interaction: discord.Interaction, attack: str):
         """Wario frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Wario', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
 
     # Yoshi
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw',
-        'Double Jump'
-    ]   
-    
     @app_commands.command(name='yoshi')
-    async def yoshi(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def yoshi(self, interaction: discord.Interaction, attack: str):
         """Yoshi frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Yoshi', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
         
     # ZSS
-    moves = Literal[
-        'Jab', 'Dash Attack',
-        'Down Tilt', 'Up Tilt', 'Forward Tilt',
-        'Neutral Air', 'Down Air', 'Up Air', 'Forward Air', 'Back Air',
-        'Down Smash', 'Up Smash', 'Forward Smash', 
-        'Up Special', 'Neutral Special',
-        'Down Special', 'Side Special',
-        'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw'
-    ]   
-    
     @app_commands.command(name='zerosuitsamus')
-    async def zerosuitsamus(self, interaction: discord.Interaction, attack: moves):
+    @app_commands.autocomplete(attack=move_autocomplete)
+    async def zerosuitsamus(self, interaction: discord.Interaction, attack: str):
         """Zero Suit Samus frame data and hitbox info"""
-        ssf2_embed, view = ssf2_hitbox('Zero Suit Samus', attack, interaction.user)
-        await interaction.response.send_message(embed=ssf2_embed[0], view=view)
+        await self.send_hitbox(interaction, attack)
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(Hitboxes(bot))
\ No newline at end of file
@@ -13,7 +13,9 @@ class Info(commands.Cog):
     async def about_command(self, interaction: discord.Interaction):
         """About SSF2 Frame Data"""
         desc = 'A Discord bot based off the Rivals of Aether Acadamy Mentorbot 3.0, modified by rosemaryrosie'
-        desc += f'```ml\n{len(self.bot.guilds):,} servers / {len(self.bot.users):,} users```'
+        # Works without the members intent, and counts members no matter what is cached
+        members = sum(guild.member_count or 0 for guild in self.bot.guilds)
+        desc += f'```ml\n{len(self.bot.guilds):,} servers / {members:,} members```'
         embed = discord.Embed(description=desc)
         embed.set_author(
             name='About SSF2 Framedata',
@@ -0,0 +1,73 @@
+import asyncio
+import os
+from pathlib import Path
+
+import discord
+from discord import app_commands
+from discord.ext import commands, tasks
+
+from utils.logs import chunk
+from utils.memory import cache_report, format_report
+
+# One file per cluster worker, each only has its own shards' numbers
+METRICS_FILE = Path(f"metrics-{os.environ['SSF2_CLUSTER_ID']}.prom" if os.environ.get('SSF2_CLUSTER_ID') else 'metrics.prom')
+
+
+def write_metrics(text: str, path: Path = METRICS_FILE):
+    # Write then rename, so a scrape never reads a half-written file
+    tmp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    tmp.write_text(text)
+    os.replace(tmp, path)
+
+
+class BotMetrics(commands.Cog):
+    """Record command latency and expose it to the owner and to Prometheus."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    async def cog_load(self):
+        self.export.start()
+
+    async def cog_unload(self):
+        self.export.cancel()
+
+    @commands.Cog.listener()
+    async def on_app_command_completion(self, interaction: discord.Interaction, command: app_commands.Command):
+        # Measured from when Discord created the interaction, the 3 second deadline starts there too
+        latency = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+        self.bot.metrics.observe('command_latency_seconds', latency, command=command.name)
+        self.bot.metrics.count('commands_total', command=command.name)
+
+    @tasks.loop(seconds=15)
+    async def export(self):
+        try:
+            await asyncio.to_thread(write_metrics, self.bot.metrics.prometheus())
+        except OSError as e:  # A full disk or a missing folder, anything escaping would stop the loop for good
+            print(f'Writing {METRICS_FILE} failed: {e!r}')
+            if self.bot.errors:
+                self.bot.errors.report(e, f'Writing {METRICS_FILE}')
+
+    @commands.command()
+    @commands.is_owner()
+    async def metrics(self, ctx: commands.Context):
+        """Show latency histograms and counters"""
+        lines = self.bot.metrics.summary() or ['Nothing recorded yet']
+        for message in chunk(lines, 1990):
+            await ctx.send(f'```ml\n{message}```')
+
+    @commands.command()
+    @commands.is_owner()
+    async def memory(self, ctx: commands.Context):
+        """Show the memory held by the discord.py caches, by object type, and the rate limit buckets"""
+        # On the event loop, the gateway would change the caches under a thread
+        report = cache_report(self.bot)
+        mode = 'low-memory' if not self.bot.intents.members else 'members intent'
+        buckets = [f'{name}: {count:,}' for name, count in self.bot.rate_limits.stats().items()]
+        lines = [f'Cache memory ({mode})'] + format_report(report) + ['', 'Rate limit buckets'] + buckets
+        for message in chunk(lines, 1990):
+            await ctx.send(f'```ml\n{message}```')
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(BotMetrics(bot))
@@ -0,0 +1,96 @@
+import asyncio
+import time
+
+from discord.ext import commands, tasks
+
+from utils.logs import chunk
+from utils.mirror import INDEX_NAME, Mirror, referenced_urls
+
+
+class MediaMirror(commands.Cog):
+    """Keep a local copy of every image the embeds link to and report dead links."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.mirror = Mirror().load()
+        self.report = {}
+        self.duration = 0.0
+        self.index_seen = self.index_mtime()
+
+    async def cog_load(self):
+        # One process checks the urls and writes data/mirror/, the other cluster workers read its index
+        (self.sync if self.bot.primary else self.follow).start()
+
+    async def cog_unload(self):
+        self.sync.cancel()
+        self.follow.cancel()
+
+    async def run(self) -> dict:
+        start = time.perf_counter()
+        failing = self.failing()
+        self.report = await self.mirror.sync(referenced_urls(self.bot.framedata.root))
+        self.duration = time.perf_counter() - start
+        print(f'Mirrored media in {self.duration:.1f} s: '
+              + ', '.join(f'{len(urls)} {outcome}' for outcome, urls in sorted(self.report.items())))
+        # A url that died, recovered or started failing changes which hits attach a file
+        if self.failing() != failing:
+            self.bot.dispatch('mirror_update', self.mirror)
+        return self.report
+
+    def failing(self) -> set:
+        return {url for url in self.mirror.entries if self.mirror.failing(url)}
+
+    def index_mtime(self) -> float:
+        try:
+            return (self.mirror.root / INDEX_NAME).stat().st_mtime
+        except OSError:
+            return 0.0
+
+    def report_error(self, error: Exception, context: str):
+        print(f'{context} failed: {error!r}')
+        if self.bot.errors:
+            self.bot.errors.report(error, context)
+
+    @tasks.loop(hours=24)
+    async def sync(self):
+        try:
+            await self.run()
+        except Exception as e:  # Anything escaping would stop the loop for good
+            self.report_error(e, 'Mirroring media')
+
+    @sync.before_loop
+    async def before_sync(self):
+        await self.bot.wait_until_ready()
+
+    @tasks.loop(minutes=5)
+    async def follow(self):
+        mtime = await asyncio.to_thread(self.index_mtime)
+        if mtime == self.index_seen:
+            return
+        self.index_seen = mtime
+        try:
+            self.mirror = await asyncio.to_thread(Mirror(self.mirror.root).load)
+        except (OSError, ValueError) as e:  # Replaced atomically, so only a hand-edited index or a bad disk gets here
+            self.report_error(e, 'Reading the media mirror index')
+            return
+        # Saved once per sync of the primary process, which may have found dead or failing urls
+        self.bot.dispatch('mirror_update', self.mirror)
+
+    @commands.command()
+    @commands.is_owner()
+    async def mirror(self, ctx: commands.Context):
+        """Check every media url now and list the dead ones"""
+        if not self.bot.primary:
+            await ctx.send('Media is mirrored by cluster 0, ask there')
+            return
+        async with ctx.channel.typing():
+            report = await self.run()
+        lines = [f'Checked in {self.duration:.1f} s: ' + ', '.join(f'{len(urls)} {outcome}' for outcome, urls in sorted(report.items()))]
+        lines += [f'dead: <{url}>' for url in self.mirror.dead()]
+        lines += [f'error: <{url}> {self.mirror.entries[url].get("error", "")}' for url in report.get('error', ())]
+        for message in chunk(lines):
+            await ctx.send(message)
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(MediaMirror(bot))
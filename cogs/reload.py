@@ -0,0 +1,83 @@
+import asyncio
+
+import discord
+from discord import app_commands
+from discord.ext import commands, tasks
+
+from utils import snapshot
+from utils.framedata import Reload
+
+
+class DataReload(commands.Cog):
+    """Watch the data folder and hot swap frame data when it changes."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.mtimes = bot.framedata.watched_files()
+        self.lock = asyncio.Lock()
+
+    async def cog_load(self):
+        self.watch.start()
+
+    async def cog_unload(self):
+        self.watch.cancel()
+
+    async def reload(self, paths) -> Reload:
+        '''Re-parses the given files off the event loop and swaps the new store in'''
+        async with self.lock:
+            mtimes = await asyncio.to_thread(self.bot.framedata.watched_files)
+            # Recorded before parsing, so a file saved again mid-reload is picked up next time
+            self.mtimes = mtimes
+            result = await asyncio.to_thread(self.bot.framedata.reloaded, paths)
+            self.bot.swap_framedata(result)
+            print(f'Reloaded {len(result.files)} data files, {result.entries} entries changed '
+                  f'in {result.duration * 1000:.1f} ms...')
+            # Keep the snapshot fresh so the next restart doesn't fall back to JSON. Every
+            # cluster worker reloads its own store, only the primary one rebuilds the file
+            if not self.bot.primary:
+                return result
+            try:
+                await asyncio.to_thread(snapshot.build, self.bot.framedata.root)
+            except Exception as e:  # The reload itself worked, the next restart loads the JSON
+                self.report(e, 'Rebuilding the frame data snapshot')
+            return result
+
+    def report(self, error: Exception, context: str):
+        print(f'{context} failed: {error!r}')
+        if self.bot.errors:
+            self.bot.errors.report(error, context)
+
+    @tasks.loop(seconds=2)
+    async def watch(self):
+        mtimes = await asyncio.to_thread(self.bot.framedata.watched_files)
+        changed = [path for path in mtimes.keys() | self.mtimes.keys() if mtimes.get(path) != self.mtimes.get(path)]
+        if not changed:
+            return
+        try:
+            await self.reload(sorted(changed))
+        except Exception as e:  # A file still being written, or valid JSON of the wrong shape
+            # Anything escaping would stop the loop for good, the old store keeps serving
+            self.mtimes = mtimes
+            self.report(e, f'Reloading {", ".join(map(str, changed))}')
+
+    @app_commands.command(name='reload')
+    async def reload_command(self, interaction: discord.Interaction):
+        """Reload every frame data file (owner only)"""
+        if not await self.bot.is_owner(interaction.user):
+            await interaction.response.send_message("You're not allowed to use this command.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        try:
+            result = await self.reload(list(self.bot.framedata.watched_files()))
+        except Exception as e:
+            self.report(e, 'Reloading every data file')
+            await interaction.followup.send(f'Reload failed, still serving the old data:\n```{e}```')
+            return
+        await interaction.followup.send(
+            f'Reloaded {len(result.files)} files: {result.entries} entries changed '
+            f'in {result.duration * 1000:.1f} ms')
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(DataReload(bot))
@@ -0,0 +1,255 @@
+import asyncio
+import math
+import time
+from typing import Literal
+
+import discord
+from discord import app_commands
+from discord.ui import Button, View
+from discord.ext import commands
+
+from utils.autocomplete import MAX_CHOICES, NameIndex
+from utils.framedata import Reload
+from utils.fulltext import NotesIndex
+from utils.leaderboards import Leaderboards
+from utils.punish import PunishTable
+from utils.query import COLUMNS, FrameTable, QueryError
+
+PAGE_SIZE = 10
+# Longest /search query or /find text, so 'Search: {query}' stays under the 256 characters of an embed author name
+MAX_QUERY = 200
+
+### Buttons ###
+
+class SearchView(View):
+    def __init__(self, table: FrameTable, query: str, rows, sort_by, elapsed: float, user: discord.User):
+        super().__init__()
+        self.table = table  # the table the query ran against, so pages stay consistent across reloads
+        self.query = query
+        self.rows = rows
+        self.sort_by = sort_by
+        self.elapsed = elapsed
+        self.user = user
+        self.page = 0
+        self.pages = max(1, math.ceil(len(rows) / PAGE_SIZE))
+
+        self.add_item(PageButton("Previous", -1, self))
+        self.add_item(PageButton("Next", 1, self))
+        self.update_buttons()
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return await interaction.client.check_rate_limit(interaction)
+
+    def update_buttons(self):
+        for item in self.children:
+            item.disabled = not 0 <= self.page + item.step < self.pages
+
+    def get_current_embed(self):
+        lines = []
+        for row in self.rows[self.page * PAGE_SIZE:(self.page + 1) * PAGE_SIZE]:
+            record = self.table.records[row]
+            fields = record.fields
+            hit_text = f' ({record.hit})' if record.hit != record.move else ''
+            details = ' | '.join(f'{field} {fields[field]}' for field in ('Startup', 'Active', 'Endlag', 'Damage', 'Angle') if fields.get(field))
+            lines.append(f'**{record.char}** {record.move}{hit_text}\n`{details}`')
+
+        embed = discord.Embed(description='\n'.join(lines) or 'No moves match that search.')
+        embed.set_author(name=f'Search: {self.query}')
+        sort_text = f', sorted by {self.sort_by}' if self.sort_by else ''
+        embed.set_footer(text=f'{len(self.rows)} results{sort_text} | page {self.page + 1}/{self.pages} | {self.elapsed * 1000:.1f} ms')
+        return embed
+
+class FindView(SearchView):
+    def __init__(self, index: NotesIndex, text: str, rows, elapsed: float, user: discord.User):
+        self.index = index
+        super().__init__(index.table, text, rows, None, elapsed, user)
+
+    def get_current_embed(self):
+        lines = []
+        for row in self.rows[self.page * PAGE_SIZE:(self.page + 1) * PAGE_SIZE]:
+            record = self.table.records[row]
+            hit_text = f' ({record.hit})' if record.hit != record.move else ''
+            found = '\n'.join(self.index.highlight(row, self.query)[:3])
+            lines.append(f'**{record.char}** {record.move}{hit_text}\n{found}')
+
+        description = '\n'.join(lines) or 'No notes mention that.'
+        if len(description) > 4096:
+            description = description[:description.rindex('\n', 0, 4096)]
+        embed = discord.Embed(description=description)
+        embed.set_author(name=f'Find: {self.query}')
+        embed.set_footer(text=f'{len(self.rows)} results, best match first | page {self.page + 1}/{self.pages} | {self.elapsed * 1000:.1f} ms')
+        return embed
+
+class PageButton(Button):
+    def __init__(self, name: str, step: int, view: SearchView):
+        self.step = step
+        self.custom_view = view
+        super().__init__(label=name, style=discord.ButtonStyle.gray)
+
+    async def callback(self, interaction: discord.Interaction):
+        if interaction.user != self.custom_view.user:
+            await interaction.response.send_message("You're not allowed to use this button.", ephemeral=True)
+            return
+
+        self.custom_view.page += self.step
+        self.custom_view.update_buttons()
+        await interaction.response.edit_message(embed=self.custom_view.get_current_embed(), view=self.custom_view)
+
+
+class Search(commands.Cog):
+    """Search frame data across every character and move."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.table = None
+        self.leaderboards = None
+        self.punishes = None
+        self.notes = None
+        self.characters = None
+        self.moves = {}
+        self.built = None
+
+    @staticmethod
+    def build(data):
+        table = FrameTable(data)
+        characters = NameIndex(table.characters)
+        moves = {char: NameIndex(move for move in movelist if data.hits[(char, move)])
+                 for char, movelist in data.movesets.items()}
+        return table, Leaderboards(table), PunishTable(table), NotesIndex(table), characters, moves
+
+    async def cog_load(self):
+        # Built while the gateway connects, commands wait for it in preloaded()
+        self.built = self.bot.preload('search index', self.build, self.bot.framedata)
+
+    async def preloaded(self):
+        if self.table is None:
+            (self.table, self.leaderboards, self.punishes, self.notes,
+             self.characters, self.moves) = await self.built
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        await self.preloaded()
+        return True
+
+    @commands.Cog.listener()
+    async def on_framedata_reload(self, reload: Reload):
+        built = await asyncio.to_thread(self.build, reload.store)
+        # A later reload may have finished first
+        if reload.store is self.bot.framedata:
+            self.table, self.leaderboards, self.punishes, self.notes, self.characters, self.moves = built
+
+    @app_commands.command(name='search')
+    @app_commands.describe(query='Filters like: startup<=5 damage>=10 angle between 250 290 move:aerial char:mario')
+    async def search(self, interaction: discord.Interaction, query: app_commands.Range[str, 1, MAX_QUERY]):
+        """Find moves across the whole roster by startup, endlag, damage, angle and more"""
+        table = self.table
+        start = time.perf_counter()
+        try:
+            rows, sort_by = table.search(query)
+        except QueryError as e:
+            await interaction.response.send_message(
+                f'{e}\nFields: {", ".join(COLUMNS)}. Filters: `field<=n`, `field between a b`, `move:`, `char:`, `has:`',
+                ephemeral=True)
+            return
+        elapsed = time.perf_counter() - start
+
+        view = SearchView(table, query, rows, sort_by, elapsed, interaction.user)
+        await interaction.response.send_message(embed=view.get_current_embed(), view=view)
+
+    @app_commands.command(name='find')
+    @app_commands.describe(text='Words to look for, like: armor, restores double jump, reflect')
+    async def find(self, interaction: discord.Interaction, text: app_commands.Range[str, 1, MAX_QUERY]):
+        """Search the notes of every move, like armor, intangibility or landing conditions"""
+        index = self.notes
+        start = time.perf_counter()
+        rows, _ = index.search(text)
+        elapsed = time.perf_counter() - start
+        view = FindView(index, text, rows, elapsed, interaction.user)
+        await interaction.response.send_message(embed=view.get_current_embed(), view=view)
+
+    move_slots = Literal[
+        'Jab', 'Dash Attack',
+        'Forward Tilt', 'Up Tilt', 'Down Tilt',
+        'Forward Smash', 'Up Smash', 'Down Smash',
+        'Neutral Air', 'Forward Air', 'Back Air', 'Up Air', 'Down Air',
+        'Neutral Special', 'Side Special', 'Up Special', 'Down Special',
+        'Taunt', 'Grab', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw',
+        'Z Aerial'
+    ]
+
+    @app_commands.command(name='fastest')
+    @app_commands.describe(move='The move slot to compare', stat='What to rank by (default: startup)')
+    async def fastest(self, interaction: discord.Interaction, move: move_slots,
+                      stat: Literal['startup', 'endlag', 'damage', 'total'] = 'startup'):
+        """Rank every character's version of a move by startup, endlag, damage or total duration"""
+        board = self.leaderboards.top(move, stat)
+        units = {'startup': 'frame {:g}', 'endlag': '{:g} frames', 'damage': '{:g}%', 'total': 'frame {:g}'}
+
+        lines = []
+        unknown = []
+        for entry in board:
+            hit_text = f' ({entry.record.hit})' if entry.record.hit != move else ''
+            if entry.rank is None:
+                unknown.append(entry.char)
+                continue
+            lines.append(f'`{entry.rank:>2}.` **{entry.char}** {units[stat].format(entry.value)}{hit_text}')
+        if unknown:
+            lines.append(f'\nNot ranked (no parseable {stat}): {", ".join(unknown)}')
+
+        embed = discord.Embed(description='\n'.join(lines) or 'No data for this move yet.')
+        order = 'highest' if stat == 'damage' else 'lowest'
+        embed.set_author(name=f'{move}: {order} {stat} across the roster')
+        embed.set_footer(text='Each character is ranked by their best hit. Up to date as of patch 1.4.0.1')
+        await interaction.response.send_message(embed=embed)
+
+    async def character_autocomplete(self, interaction: discord.Interaction, current: str):
+        await self.preloaded()
+        names = self.characters.search(current)
+        # Nicknames and other spellings ('dk', 'zss') first, then whatever contains the text
+        found = self.table.data.registry.get(current) if current else None
+        if found and found.info:
+            names = (found.info, *(name for name in names if name != found.info))[:MAX_CHOICES]
+        return [app_commands.Choice(name=char, value=char) for char in names]
+
+    async def move_autocomplete(self, interaction: discord.Interaction, current: str):
+        await self.preloaded()
+        character = self.table.data.registry.get(interaction.namespace.character or '')
+        index = self.moves.get(character.info) if character else None
+        if index is None:
+            return []
+        return [app_commands.Choice(name=move, value=move) for move in index.search(current)]
+
+    @app_commands.command(name='punish')
+    @app_commands.describe(character='The character whose move you want to punish', move='The move to punish')
+    @app_commands.autocomplete(character=character_autocomplete, move=move_autocomplete)
+    async def punish(self, interaction: discord.Interaction, character: str, move: str):
+        """List every character's options that are fast enough to punish a move's endlag"""
+        punishes = self.punishes
+        # Any name of the character works, e.g. 'chibi-robo' or 'Mr. Game and Watch'
+        found = punishes.table.data.registry.get(character)
+        character = found.info if found and found.info else character
+        if (character, move) not in punishes.table.data.hits:
+            await interaction.response.send_message(f"{character} doesn't have a move called '{move}'.", ephemeral=True)
+            return
+        result = punishes.punish(character, move, per_character=3)
+        if result.window is None:
+            await interaction.response.send_message(f"{character}'s {move} has no endlag data yet.", ephemeral=True)
+            return
+
+        lines = []
+        for char, options in result.punishers:
+            fastest = ', '.join(f'{option.move} (f{option.startup}, +{option.margin})' for option in options)
+            lines.append(f'**{char}** {fastest}')
+        description = '\n'.join(lines) or 'Nothing in the roster is fast enough.'
+        if len(description) > 4096:
+            description = description[:description.rindex('\n', 0, 4096)]
+
+        embed = discord.Embed(description=description)
+        hit_text = f' ({result.hit})' if result.hit != move else ''
+        embed.set_author(name=f'Punishing {character} {move}{hit_text}: {result.window} frames of endlag')
+        embed.set_footer(text='Fastest 3 options per character: first active frame and frames to spare. '
+                              'Aerial startup does not include jumpsquat. Up to date as of patch 1.4.0.1')
+        await interaction.response.send_message(embed=embed)
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Search(bot))
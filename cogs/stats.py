@@ -1,30 +1,80 @@
+import functools
+import math
+
 import discord
 from discord import app_commands
 from discord.ext import commands
 
-import json
+from utils.autocomplete import NameIndex
+from utils.framedata import FrameDataStore, Reload
+from utils.statmatrix import AVERAGE, StatMatrix
+
+SHEET = "https://docs.google.com/spreadsheets/d/1VcHU6YIGG0LBQ7lHXAgolLiIgIINWnmdw6jHj-NBIz4/edit?usp=sharing"
+
+def signed(value: float, spec: str) -> str:
+    return '' if math.isnan(value) else format(value, '+' + spec)
+
+@functools.lru_cache(maxsize=256)
+def stat_table(matrix: StatMatrix, char: str) -> str:
+    '''The /stats table of a character, built once per matrix'''
+    if char == AVERAGE:
+        desc = f'{"Stat":<20}{"Roster avg":>11}\n'
+        for line in matrix.lines(char):
+            desc += f'{line.stat:<20}{line.value:>11.2f}\n'
+    else:
+        desc = f'{"Stat":<20}{"Value":>7}{"vs avg":>8}{"z":>6}{"pct":>5}\n'
+        for line in matrix.lines(char):
+            desc += f'{line.stat:<20}{line.value:>7g}{signed(line.delta, ".2f"):>8}{signed(line.z, ".1f"):>6}{line.percentile:>5.0f}\n'
+            for label, variant in matrix.variants.get((char, line.stat), ()):
+                desc += f'{"  " + label:<20}{variant.value:>7g}{signed(variant.delta, ".2f"):>8}{signed(variant.z, ".1f"):>6}{variant.percentile:>5.0f}\n'
+    return desc
+
+def embed_style(data: FrameDataStore, char: str) -> tuple:
+    '''(color, icon) of a stats.json entry, from the character registry except for the roster average'''
+    character = data.registry.get(char) if char != AVERAGE else None
+    if character is None:
+        info = data.charstats(char)['Embed Info']
+        return int(info['color'], 16), info['icon']
+    return character.color, character.icon
 
-def ssf2_charinfo(char: str):
+def ssf2_charinfo(data: FrameDataStore, matrix: StatMatrix, char: str):
     '''
     The function used by the character commands to collect the data required
-    
+
+    Every stat is shown with its difference from the roster average, its z-score and
+    the share of the roster it is higher than, all precomputed by the StatMatrix
+
+    Returns:
+        A discord embed
+    '''
+    charinfo = data.charstats(char)
+    desc = stat_table(matrix, char)
+
+    color, icon = embed_style(data, char)
+    embed = discord.Embed(description=f'```py\n{desc}```', color=color)
+    embed.set_image(url=charinfo['Embed Info']['image'])
+    embed.set_author(name=f'{char} Information', icon_url=icon, url=SHEET)
+    embed.set_footer(text='pct: share of the roster with a lower value. Up to date as of patch 1.4.0.1')
+
+    return embed
+
+def ssf2_statcompare(data: FrameDataStore, matrix: StatMatrix, first: str, second: str):
+    '''
+    Compares the stats of two characters side by side
+
     Returns:
         A discord embed
     '''
-    with open('data//stats/stats.json', 'r') as i:
-        charinfo = json.load(i)
-    
-    desc = ''
-             
-    for idx, info in enumerate(charinfo[char]["Stats"]):
-        desc += f'{info}: {charinfo[char]["Stats"][info]}\n'       
-    
-        embed = discord.Embed(description=f'```py\n{desc}```', color=int(charinfo[char]['Embed Info']['color'], 16))
-        embed.set_image(url=charinfo[char]['Embed Info']['image'])
-        embed.set_author(name=f'{char} Information', icon_url=charinfo[char]['Embed Info']['icon'], url = "https://docs.google.com/spreadsheets/d/1VcHU6YIGG0LBQ7lHXAgolLiIgIINWnmdw6jHj-NBIz4/edit?usp=sharing")
-        embed.set_footer(text='Up to date as of patch 1.4.0.1')
-        
-    return embed        
+    a, b = matrix.lines(first), matrix.lines(second)
+    desc = f'{"Stat":<20}{first[:8]:>9}{second[:8]:>9}{"diff":>8}\n'
+    for x, y in zip(a, b):
+        desc += f'{x.stat:<20}{x.value:>9.4g}{y.value:>9.4g}{signed(x.value - y.value, ".2f"):>8}\n'
+
+    color, icon = embed_style(data, first)
+    embed = discord.Embed(description=f'```py\n{desc}```', color=color)
+    embed.set_author(name=f'{first} vs {second}', icon_url=icon, url=SHEET)
+    embed.set_footer(text='Up to date as of patch 1.4.0.1')
+    return embed
 
 
 class Stats(commands.Cog):
@@ -32,34 +82,54 @@ class Stats(commands.Cog):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        # Every character in stats.json, including 'Average'
+        self.characters = NameIndex(bot.framedata.stats)
+        self.matrix = StatMatrix(bot.framedata.stats)
 
-    characters = [
-        'Average', 'Bandana Dee', 'Black Mage', 'Bomberman', 'Bowser', 'Captain Falcon',
-        'Chibi-Robo', 'Donkey Kong', 'Falco', 'Fox', 'Ganondorf',
-        'Goku', 'Ichigo', 'Isaac', 'Jigglypuff', 'Kirby',
-        'Krystal', 'Link', 'Lloyd', 'Lucario', 'Luffy',
-        'Luigi', 'Mario', 'Marth', 'Mega Man', 'Meta Knight',
-        'Mr. Game and Watch', 'Naruto', 'Ness', 'PAC-MAN', 'Peach',
-        'Pichu', 'Pikachu', 'Pit', 'Rayman', 'Ryu',
-        'Samus', 'Sandbag', 'Sheik', 'Simon', 'Sonic',
-        'Sora', 'Tails', 'Waluigi', 'Wario', 'Yoshi',
-        'Zelda', 'Zero Suit Samus', 'King Dedede'
-    ]
+    @commands.Cog.listener()
+    async def on_framedata_reload(self, reload: Reload):
+        self.characters = NameIndex(reload.store.stats)
+        self.matrix = StatMatrix(reload.store.stats)
 
     async def character_autocomplete(self, interaction: discord.Interaction, current: str):
-        return [
-            app_commands.Choice(name=char, value=char)
-            for char in self.characters
-            if current.lower() in char.lower()
-        ][:25]
+        return [app_commands.Choice(name=char, value=char) for char in self.characters.search(current)]
+
+    def stats_name(self, name: str):
+        '''The stats.json name of any name of a character, None when it has no stats'''
+        character = self.bot.framedata.registry.get(name) if name != AVERAGE else None
+        stats = character.stats if character else name
+        # The matrix is rebuilt just after a reload swaps the store in, so check both
+        return stats if stats in self.matrix and stats in self.bot.framedata.stats else None
 
     @app_commands.command(name='stats')
     @app_commands.describe(character="Choose a character")
     @app_commands.autocomplete(character=character_autocomplete)
     async def stats(self, interaction: discord.Interaction, character: str):
         """Show frame data and hitbox info for a character."""
-        ssf2_embed = ssf2_charinfo(character)
-        await interaction.response.send_message(embed=ssf2_embed)
+        metrics = self.bot.metrics
+        with metrics.time('command_stage_seconds', command='stats', stage='lookup'):
+            # Any name of the character works, e.g. 'blackmage' or 'Mr Game and Watch'
+            name = self.stats_name(character)
+        if name is None:
+            await interaction.response.send_message(f"There are no stats for '{character}'.", ephemeral=True)
+            return
+        with metrics.time('command_stage_seconds', command='stats', stage='embed'):
+            ssf2_embed = ssf2_charinfo(self.bot.framedata, self.matrix, name)
+        with metrics.time('command_stage_seconds', command='stats', stage='send'):
+            await interaction.response.send_message(embed=ssf2_embed)
+
+    @app_commands.command(name='statcompare')
+    @app_commands.describe(first="Choose a character", second="Choose a character to compare against")
+    @app_commands.autocomplete(first=character_autocomplete, second=character_autocomplete)
+    async def statcompare(self, interaction: discord.Interaction, first: str, second: str):
+        """Compare the stats of two characters side by side."""
+        names = []
+        for character in (first, second):
+            names.append(self.stats_name(character))
+            if names[-1] is None:
+                await interaction.response.send_message(f"There are no stats for '{character}'.", ephemeral=True)
+                return
+        await interaction.response.send_message(embed=ssf2_statcompare(self.bot.framedata, self.matrix, *names))
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(Stats(bot))
\ No newline at end of file
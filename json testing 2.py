@@ -1,58 +0,0 @@
-import json
-
-char = 'Sora'
-move = 'Jab'
-
-
-with open('data/stats/stats.json', 'r') as i:
-        charinfo = json.load(i)
-      
-desc = ""
-             
-#for idx, j in enumerate(charinfo[char]):
-#    # Iterates through the different stats a character has
-#    desc = ""
-#    print(charinfo[char][j])
-
-
-### DOESN'T WORK FOR GOKU
-# make kk goku a seperate character?
-for idx, info in enumerate(charinfo[char]["Stats"]):
-    diff = float(charinfo[char]["Stats"][info]) - float(charinfo["Average"]["Stats"][info])
-    desc += f'{info}: {str(round(diff, 2))}\n'
-    
-print(desc)
-
-'''
-with open('data/characters.json', 'r') as c:
-    charidentifier = json.load(c)
-
-with open(f'data/info/{char}.json', 'r') as f:
-    charinfo = json.load(f)
-
-embeds = []
-gif_pairs = []  # (fullspeed_url, slowmo_url)
-hits = []
-desc = ''
-
-# Character info for embed title, author, etc
-for idx, identifier in enumerate(charidentifier[char]):
-    print(f'{identifier} {charidentifier[char][identifier]}')
-                        # charidentifier[char][identifier] returns characters id, color, icon
-
-# Move info for embed description    
-for i, hit in enumerate(charinfo[move]["Hitboxes"]):
-    # Iterates through the different hits the move has
-    hits.append(hit)   
-    
-    # For every value listed in each hit prints the value name and value value
-    for idx, info in enumerate(charinfo[move]["Hitboxes"][f'{hit}']):
-        desc += f'{info}: {charinfo[move]["Hitboxes"][f'{hit}'][f'{info}']}\n'
-        
-    
-    # Extract images
-    #print(f'Image: {charinfo[move]["Images"]["Full Speed"][f"{hit}"]}')
-    #print(f'Slowmo: {charinfo[move]["Images"]["Slowmo"][f"{hit}"]}')
-    
-print(hits)
-'''
\ No newline at end of file
@@ -0,0 +1,89 @@
+'''
+Autocomplete indexes
+
+    NameIndex answers "which of these names match what the user has typed so far".
+    Matches are ranked in three tiers:
+        0  the name starts with the text          'ma'  -> Mario, Marth
+        1  a later word of the name starts with it 'air' -> Neutral Air, Up Air, ...
+        2  the text appears anywhere in the name   'rio' -> Mario
+    and by the name's original order within a tier.
+
+    Tiers 0 and 1 come from a prefix trie over every word start of every name, tier 2
+    from a trigram index. Results are cached per normalized text, so a burst of identical
+    keystrokes from many guilds is a dict lookup. Everything runs synchronously on the
+    event loop, so concurrent autocomplete requests never see a half-built index.
+'''
+import re
+
+from utils.cache import LRUCache
+
+MAX_CHOICES = 25  # Discord's limit
+
+
+def normalize(text: str) -> str:
+    return re.sub(r'[^a-z0-9 ]', '', text.lower()).strip()
+
+
+def trigrams(text: str):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class NameIndex:
+    def __init__(self, names, cache_size: int = 1024):
+        self.names = tuple(dict.fromkeys(names))  # drop duplicates, keep order
+        self.trie = {}
+        self.grams = {}
+        self.cache = LRUCache(cache_size)
+
+        for i, name in enumerate(self.names):
+            words = normalize(name).split()
+            for w in range(len(words)):
+                tier = 0 if w == 0 else 1
+                # 'Mr Game and Watch' is reachable from 'mrgame' as well as 'mr game'
+                for key in {' '.join(words[w:]), ''.join(words[w:])}:
+                    self.insert(key, i, tier)
+            compact = ''.join(words)
+            for gram in trigrams(compact):
+                self.grams.setdefault(gram, set()).add(i)
+
+    def insert(self, key: str, i: int, tier: int):
+        node = self.trie
+        for char in key:
+            node = node.setdefault(char, {})
+            matches = node.setdefault('', {})  # '' can't be a normalized character, so it's safe as a key
+            matches[i] = min(tier, matches.get(i, tier))
+
+    def prefix(self, text: str) -> dict:
+        '''name id -> best tier of every name with a word starting with the text'''
+        node = self.trie
+        for char in text:
+            node = node.get(char)
+            if node is None:
+                return {}
+        return node.get('', {})
+
+    def substring(self, text: str) -> set:
+        compact = text.replace(' ', '')
+        if len(compact) < 3:
+            return {i for i, name in enumerate(self.names) if compact in normalize(name).replace(' ', '')}
+        grams = sorted((self.grams.get(g, set()) for g in trigrams(compact)), key=len)
+        candidates = set.intersection(*grams) if grams else set()
+        # Trigrams can all match without being contiguous, so check the real substring
+        return {i for i in candidates if compact in normalize(self.names[i]).replace(' ', '')}
+
+    def search(self, text: str, limit: int = MAX_CHOICES) -> tuple:
+        text = normalize(text)
+        results = self.cache.get(text)
+        if results is None:
+            if not text:
+                results = self.names
+            else:
+                tiers = dict(self.prefix(text))
+                for i in self.substring(text):
+                    tiers.setdefault(i, 2)
+                results = tuple(self.names[i] for i in sorted(tiers, key=lambda i: (tiers[i], i)))
+            self.cache.put(text, results)
+        return results[:limit]
+
+    def __contains__(self, name: str):
+        return name in self.names
@@ -0,0 +1,203 @@
+'''
+Offline command benchmarks
+
+    `python -m utils.bench` runs the real command code paths (ssf2_hitbox, the HitboxView
+    buttons, ssf2_charinfo and the autocomplete callbacks) against stub interactions, so
+    nothing touches the network. For each it reports p50/p99 latency, ops/sec and the bytes
+    allocated per call (peak traced memory, measured in a separate tracemalloc pass so it
+    doesn't skew the timings).
+
+        --data DIR       benchmark another data folder, e.g. one from `python -m utils.synthetic`
+        --output FILE    save the results as JSON
+        --compare FILE   print the change against a saved run
+'''
+import asyncio
+import inspect
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+
+import discord
+
+from cogs.hitboxes import Hitboxes, ssf2_hitbox
+from cogs.stats import Stats, ssf2_charinfo
+from utils.embeds import hitbox_payloads
+from utils.framedata import DATA_DIR, FrameDataStore
+from utils.metrics import Metrics
+
+
+### Stubs ###
+
+class FakeResponse:
+    def __init__(self):
+        self.done = False
+
+    async def send_message(self, *args, **kwargs):
+        self.done = True
+
+    async def edit_message(self, *args, **kwargs):
+        self.done = True
+
+    async def defer(self, *args, **kwargs):
+        self.done = True
+
+    def is_done(self):
+        return self.done
+
+
+class FakeInteraction:
+    '''Just enough of discord.Interaction for the command and button callbacks'''
+
+    def __init__(self, client, user, command: str = None):
+        self.client = client
+        self.user = user
+        self.guild = None
+        self.command = SimpleNamespace(name=command)
+        self.response = FakeResponse()
+        self.created_at = discord.utils.utcnow()
+
+
+class FakeBot:
+    def __init__(self, framedata: FrameDataStore):
+        self.framedata = framedata
+        self.metrics = Metrics()
+        self.cogs = {}
+
+    def get_cog(self, name: str):
+        return self.cogs.get(name)
+
+
+### Measurement ###
+
+def percentile(samples: list, q: float) -> float:
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+async def measure(fn, inputs: list, rounds: int) -> dict:
+    '''Calls fn once per input, rounds times over, and summarizes the per call timings'''
+    is_async = inspect.iscoroutinefunction(fn)
+
+    async def call(x):
+        return await fn(x) if is_async else fn(x)
+
+    for x in inputs:  # warm up caches the way a running bot would have
+        await call(x)
+
+    samples = []
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for x in inputs:
+            t = time.perf_counter()
+            await call(x)
+            samples.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - start
+    samples.sort()
+
+    peaks = []
+    tracemalloc.start()
+    for x in inputs:
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        await call(x)
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+
+    return {
+        'calls': len(samples),
+        'p50_us': percentile(samples, 0.50) * 1e6,
+        'p99_us': percentile(samples, 0.99) * 1e6,
+        'mean_us': statistics.fmean(samples) * 1e6,
+        'ops_per_sec': len(samples) / elapsed,
+        'alloc_bytes': statistics.fmean(peaks),
+    }
+
+
+async def run(data: Path = DATA_DIR, rounds: int = 20) -> dict:
+    store = FrameDataStore(data).load()
+    bot = FakeBot(store)
+    user = SimpleNamespace(id=1, name='bench')
+
+    hitboxes = Hitboxes(bot)
+    bot.cogs['Hitboxes'] = hitboxes
+    hitboxes.embeds.warm()
+    stats = Stats(bot)
+    embeds = hitboxes.embeds
+
+    moves = [(char, move) for (char, move), hits in store.hits.items() if hits]
+    names = list(store.stats)
+    prefixes = sorted({name.lower()[:n] for name in names for n in range(1, 5)})
+
+    async def send_hitbox(key):
+        char, move = key
+        interaction = FakeInteraction(bot, user, char.lower().replace(' ', ''))
+        await hitboxes.send_hitbox(interaction, move)
+
+    views = [ssf2_hitbox(embeds, char, move, user)[2] for char, move in moves]
+    buttons = [button for view in views for button in view.children]
+
+    async def press(button):
+        await button.callback(FakeInteraction(bot, user))
+
+    async def character_autocomplete(text):
+        return await stats.character_autocomplete(FakeInteraction(bot, user, 'stats'), text)
+
+    benchmarks = {
+        'ssf2_hitbox': (lambda key: ssf2_hitbox(embeds, *key, user), moves),
+        'hitbox_render': (lambda key: hitbox_payloads(store, *key, 0), moves),
+        'send_hitbox': (send_hitbox, moves),
+        'HitboxView buttons': (press, buttons),
+        'ssf2_charinfo': (lambda char: ssf2_charinfo(store, stats.matrix, char), names),
+        'character_autocomplete': (character_autocomplete, prefixes),
+    }
+    results = {}
+    for name, (fn, inputs) in benchmarks.items():
+        results[name] = await measure(fn, inputs, rounds)
+
+    return {
+        'meta': {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'discord.py': discord.__version__,
+            'data': str(data),
+            'characters': len(store.movesets),
+            'hits': len(store),
+            'load_ms': store.load_time * 1000,
+            'rounds': rounds,
+        },
+        'results': results,
+    }
+
+
+def report(run: dict, baseline: dict = None):
+    meta = run['meta']
+    print(f'{meta["characters"]} characters / {meta["hits"]} hits from {meta["data"]}, '
+          f'loaded in {meta["load_ms"]:.1f} ms\n')
+    print(f'{"benchmark":<24}{"p50 (us)":>10}{"p99 (us)":>10}{"ops/sec":>12}{"alloc (B)":>11}')
+    for name, r in run['results'].items():
+        line = f'{name:<24}{r["p50_us"]:>10.1f}{r["p99_us"]:>10.1f}{r["ops_per_sec"]:>12,.0f}{r["alloc_bytes"]:>11,.0f}'
+        old = (baseline or {}).get('results', {}).get(name)
+        if old:
+            line += f'   p50 {r["p50_us"] / old["p50_us"] - 1:+.0%} p99 {r["p99_us"] / old["p99_us"] - 1:+.0%}'
+        print(line)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark the command code paths offline')
+    parser.add_argument('--data', type=Path, default=DATA_DIR)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--output', type=Path)
+    parser.add_argument('--compare', type=Path)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.data, args.rounds))
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    report(results, baseline)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=4))
+        print(f'\nSaved to {args.output}')
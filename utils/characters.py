@@ -0,0 +1,126 @@
+'''
+Character registry
+
+    The same character is named differently in every source: 'Black Mage' in characters.json
+    and stats.json but 'Blackmage' in ssf2.py, 'ChibiRobo' in characters.json and the info
+    file name but 'Chibi-Robo' in stats.json and ssf2.py, 'Mr. Game and Watch' in stats.json.
+    CharacterRegistry keys every character by its id in characters.json and maps every name
+    from every source, lowercased with spaces and punctuation dropped, to that id, so any
+    spelling (and the slash command names, which are spelled the same way) resolves with one
+    dict lookup.
+
+    Names that resolve to no character, or to a different one than expected, are listed in
+    problems, which FrameDataStore prints when it loads.
+'''
+import importlib.util
+import re
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from utils.statmatrix import AVERAGE
+
+# Short names people use that no source spells out
+NICKNAMES = {
+    'bd': 'Bandana Dee', 'bandana': 'Bandana Dee', 'bm': 'Black Mage', 'cf': 'Captain Falcon',
+    'falcon': 'Captain Falcon', 'dk': 'Donkey Kong', 'ddd': 'King Dedede', 'dedede': 'King Dedede',
+    'mk': 'Meta Knight', 'gnw': 'Mr Game and Watch', 'gw': 'Mr Game and Watch',
+    'pac': 'PAC-MAN', 'zss': 'Zero Suit Samus',
+}
+
+
+def normalize(name: str) -> str:
+    return re.sub(r'[^a-z0-9]', '', name.lower())
+
+
+class Character(NamedTuple):
+    id: int                 # from characters.json
+    name: str               # key in characters.json
+    color: int
+    icon: str
+    emote: Optional[str]    # from ssf2.py
+    info: Optional[str]     # name of info/{info}.json and the key of its moves in the store, None without frame data
+    stats: Optional[str]    # key in stats/stats.json
+
+
+class CharacterRegistry:
+    '''
+    CharacterRegistry
+
+        characters: id -> Character
+        aliases:    normalized name -> id, for every name of every source and the nicknames
+        problems:   names that didn't resolve cleanly, one line each
+    '''
+
+    def __init__(self, characters: dict, info: list = (), stats: list = (), emotes: dict = None):
+        self.aliases = {}
+        self.problems = []
+        for name, entry in characters.items():
+            self.alias(name, entry['id'], 'characters.json')
+
+        matched = {}
+        for source, names in (('info', info), ('stats.json', stats), ('ssf2.py', emotes or {})):
+            matched[source] = {}
+            for name in names:
+                if source == 'stats.json' and name == AVERAGE:
+                    continue
+                char_id = self.aliases.get(normalize(name))
+                if char_id is None:
+                    self.problems.append(f'{source}: {name!r} matches no character in characters.json')
+                elif char_id in matched[source]:
+                    self.problems.append(f'{source}: {matched[source][char_id]!r} and {name!r} are both character {char_id}')
+                else:
+                    matched[source][char_id] = name
+
+        self.characters = {}
+        for name, entry in characters.items():
+            char_id = entry['id']
+            emote_key = matched['ssf2.py'].get(char_id)
+            self.characters[char_id] = Character(
+                char_id, name, int(entry['color'], 16), entry['icon'],
+                emotes[emote_key]['emote'] if emote_key else None,
+                matched['info'].get(char_id), matched['stats.json'].get(char_id))
+        for source in ('stats.json', 'ssf2.py'):
+            if source == 'ssf2.py' and not emotes:
+                continue
+            missing = [char.name for char in self.characters.values() if char.id not in matched[source]]
+            if missing:
+                self.problems.append(f'{source}: nothing for {", ".join(missing)}')
+
+        # Every other spelling only after the characters.json names, which win any clash
+        for source, names in matched.items():
+            for char_id, name in names.items():
+                self.alias(name, char_id, source)
+        for nickname, name in NICKNAMES.items():
+            if normalize(name) in self.aliases:
+                self.alias(nickname, self.aliases[normalize(name)], 'nicknames')
+
+    def alias(self, name: str, char_id: int, source: str):
+        key = normalize(name)
+        known = self.aliases.setdefault(key, char_id)
+        if known != char_id:
+            self.problems.append(f'{source}: {name!r} is already the name of character {known}')
+
+    def get(self, name: str) -> Optional[Character]:
+        '''The character with any of its names, None when nothing is called that'''
+        char_id = self.aliases.get(normalize(name))
+        return None if char_id is None else self.characters[char_id]
+
+    def __getitem__(self, char_id: int) -> Character:
+        return self.characters[char_id]
+
+    def __iter__(self):
+        return iter(self.characters.values())
+
+    def __len__(self):
+        return len(self.characters)
+
+
+def load_emotes(root: Path) -> dict:
+    '''Character name -> {'color', 'emote', 'icon'} from the ssf2.py of a data folder, empty without one'''
+    path = root / 'ssf2.py'
+    if not path.exists():
+        return {}
+    spec = importlib.util.spec_from_file_location('ssf2', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.characters
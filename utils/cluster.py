@@ -0,0 +1,238 @@
+'''
+Cluster launcher
+
+    `python -m utils.cluster --clusters 2` runs bot.py as several worker processes, each
+    identifying a contiguous range of the shards:
+
+        --clusters N   worker processes
+        --shards M     total shards, by default the count Discord recommends for the bot
+        --api URL      talk to a stand-in gateway (utils.gateway) instead of Discord
+
+    Data: the compiled snapshot (data/framedata.snapshot) is built once here if it is missing
+    or stale, so every worker maps that one file read-only instead of each parsing the JSON.
+    Cluster 0 is the only worker that writes shared files: it rebuilds the snapshot after a
+    hot reload and runs the media mirror sync, the others reload its mirror index when it
+    changes. Every worker writes its own metrics-{id}.prom.
+
+    Health: every worker loads cogs/cluster.py, which writes run/cluster-{id}.json every few
+    seconds. A worker is restarted when it exits, when its heartbeat is older than --timeout,
+    when one of its shards stays disconnected for --timeout, or when it isn't ready --startup
+    seconds after starting. Restarts back off from 1 s up to 60 s, and the backoff resets once a
+    worker has been healthy for STABLE seconds. Workers are first started one at a time, each
+    once the previous one is ready, so they don't all identify at once.
+'''
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+from pathlib import Path
+
+import aiohttp
+
+from utils.framedata import DATA_DIR
+from utils.snapshot import Snapshot, SnapshotError, build
+
+RUN_DIR = Path('run')
+DISCORD_API = 'https://discord.com'
+STABLE = 300.0          # seconds of health after which a worker's backoff resets
+MAX_BACKOFF = 60.0
+CHECK_SECONDS = 1.0
+
+
+def shard_ranges(shard_count: int, clusters: int) -> list:
+    '''Splits the shards into contiguous ranges, sizes differing by at most one'''
+    clusters = min(clusters, shard_count)
+    size, extra = divmod(shard_count, clusters)
+    ranges = []
+    start = 0
+    for i in range(clusters):
+        end = start + size + (i < extra)
+        ranges.append(range(start, end))
+        start = end
+    return ranges
+
+
+async def gateway_info(api: str, token: str) -> tuple:
+    '''(recommended shard count, gateway url) from GET /gateway/bot'''
+    headers = {'Authorization': f'Bot {token}'}
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f'{api}/api/v10/gateway/bot', headers=headers) as response:
+            response.raise_for_status()
+            data = await response.json()
+    return data['shards'], data['url']
+
+
+def ensure_snapshot(root: Path = DATA_DIR):
+    try:
+        Snapshot(root).close()
+    except SnapshotError as e:
+        print(f'{e}, building it once for every worker...')
+        build(root)
+
+
+class Worker:
+    def __init__(self, cluster_id: int, shards: range, shard_count: int, env: dict):
+        self.cluster_id = cluster_id
+        self.shards = shards
+        self.heartbeat_path = RUN_DIR / f'cluster-{cluster_id}.json'
+        self.env = dict(env,
+                        SSF2_CLUSTER_ID=str(cluster_id),
+                        SSF2_SHARD_IDS=','.join(map(str, shards)),
+                        SSF2_SHARD_COUNT=str(shard_count),
+                        SSF2_HEARTBEAT=str(self.heartbeat_path))
+        self.process = None
+        self.started = 0.0
+        self.healthy_since = None
+        self.closed_since = None
+        self.failures = 0
+        self.restarts = 0
+
+    def __str__(self):
+        return f'cluster {self.cluster_id} (shards {self.shards.start}-{self.shards.stop - 1})'
+
+    async def start(self):
+        self.heartbeat_path.unlink(missing_ok=True)
+        self.process = await asyncio.create_subprocess_exec(sys.executable, 'bot.py', env=self.env)
+        self.started = time.monotonic()
+        self.healthy_since = self.closed_since = None
+        print(f'{self} started, pid {self.process.pid}')
+
+    async def stop(self, timeout: float = 10.0):
+        if self.process is None or self.process.returncode is not None:
+            return
+        # SIGINT makes bot.run() close the bot, which flushes the queued logs first
+        self.process.send_signal(signal.SIGINT if os.name == 'posix' else signal.SIGTERM)
+        try:
+            await asyncio.wait_for(self.process.wait(), timeout)
+        except asyncio.TimeoutError:
+            self.process.kill()
+            await self.process.wait()
+
+    def heartbeat(self):
+        try:
+            state = json.loads(self.heartbeat_path.read_text())
+        except (OSError, ValueError):
+            return None
+        # A file left by the previous process doesn't count
+        return state if state.get('pid') == self.process.pid else None
+
+    def problem(self, timeout: float, startup: float):
+        '''Why the worker needs a restart, None while it is healthy or still starting'''
+        if self.process.returncode is not None:
+            return f'exited with code {self.process.returncode}'
+        now = time.monotonic()
+        state = self.heartbeat()
+        if state is None or not state['ready']:
+            if now - self.started > startup:
+                return f'not ready {now - self.started:.0f} s after starting'
+            return None
+        if time.time() - state['time'] > timeout:
+            return f'no heartbeat for {time.time() - state["time"]:.0f} s'
+        closed = [shard for shard, info in state['shards'].items() if info['closed']]
+        if not closed:
+            self.closed_since = None
+        elif self.closed_since is None:
+            self.closed_since = now
+        elif now - self.closed_since > timeout:
+            return f'shards {", ".join(closed)} disconnected for {now - self.closed_since:.0f} s'
+        if self.healthy_since is None:
+            self.healthy_since = now
+            print(f'{self} ready, {state["guilds"]} guilds')
+        elif now - self.healthy_since > STABLE:
+            self.failures = 0
+        return None
+
+    def backoff(self) -> float:
+        return min(MAX_BACKOFF, 2.0 ** self.failures)
+
+
+class ClusterLauncher:
+    def __init__(self, workers: list, timeout: float = 60.0, startup: float = 120.0):
+        self.workers = workers
+        self.timeout = timeout
+        self.startup = startup
+        self.stopping = asyncio.Event()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stopping.set)
+            except NotImplementedError:  # Windows, Ctrl+C still raises KeyboardInterrupt
+                pass
+
+        RUN_DIR.mkdir(exist_ok=True)
+        try:
+            for worker in self.workers:
+                await worker.start()
+                await self.wait_ready(worker)
+            await self.supervise()
+        finally:
+            await asyncio.gather(*(worker.stop() for worker in self.workers))
+            print('Every worker stopped')
+
+    async def wait_ready(self, worker: Worker):
+        while not self.stopping.is_set() and worker.healthy_since is None:
+            if worker.problem(self.timeout, self.startup):
+                return  # supervise() restarts it
+            await asyncio.sleep(CHECK_SECONDS)
+
+    async def supervise(self):
+        restarting = {}  # worker -> restart task
+        while not self.stopping.is_set():
+            for worker in self.workers:
+                if worker in restarting:
+                    continue
+                problem = worker.problem(self.timeout, self.startup)
+                if problem:
+                    restarting[worker] = asyncio.create_task(self.restart(worker, problem))
+                    restarting[worker].add_done_callback(lambda _, w=worker: restarting.pop(w))
+            try:
+                await asyncio.wait_for(self.stopping.wait(), CHECK_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+        for task in list(restarting.values()):
+            task.cancel()
+
+    async def restart(self, worker: Worker, problem: str):
+        delay = worker.backoff()
+        print(f'{worker} {problem}, restarting in {delay:.0f} s')
+        await worker.stop()
+        await asyncio.sleep(delay)
+        worker.failures += 1
+        worker.restarts += 1
+        await worker.start()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run the bot as several sharded worker processes')
+    parser.add_argument('--clusters', type=int, default=2)
+    parser.add_argument('--shards', type=int, help='total shards, default: recommended by Discord')
+    parser.add_argument('--api', help='base url of a stand-in gateway, e.g. http://127.0.0.1:8765')
+    parser.add_argument('--timeout', type=float, default=60.0, help='seconds without a heartbeat before a restart')
+    parser.add_argument('--startup', type=float, default=120.0, help='seconds a worker gets to become ready')
+    args = parser.parse_args()
+
+    async def main():
+        with open('KEYS.json', 'r') as f:
+            token = json.load(f)['TOKEN']
+        recommended, gateway = await gateway_info(args.api or DISCORD_API, token)
+        shard_count = args.shards or recommended
+        ensure_snapshot()
+
+        env = dict(os.environ)
+        if args.api:
+            env.update(SSF2_API=args.api, SSF2_GATEWAY=gateway)
+        ranges = shard_ranges(shard_count, args.clusters)
+        print(f'{shard_count} shards over {len(ranges)} workers')
+        workers = [Worker(i, shards, shard_count, env) for i, shards in enumerate(ranges)]
+        await ClusterLauncher(workers, args.timeout, args.startup).run()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
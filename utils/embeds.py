@@ -0,0 +1,181 @@
+import threading
+from concurrent.futures import Future
+
+import discord
+
+from utils.cache import LRUCache
+from utils.framedata import FrameDataStore, Reload
+from utils.media import MediaStore
+from utils.mirror import Mirror
+
+FOOTER = 'Up to date as of patch 1.4.0.1'
+
+
+def local_gif(data: FrameDataStore, char: str, move: str, index: int, slowmo: bool,
+              media: MediaStore = None, mirror: Mirror = None):
+    '''
+    The local file to attach instead of a hit's gif url, if any
+
+    A hit without a url, or whose url is dead or keeps failing, uses its copy from the
+    media store, then the mirrored copy of the url. Working urls are always sent as urls.
+    '''
+    hit = data.move(char, move)[index]
+    url = hit.slowmo if slowmo else hit.fullspeed
+    if url and not (mirror and mirror.failing(url)):
+        return None
+    asset = media.asset(char, move, hit.name, slowmo) if media else None
+    if asset:
+        return asset.path
+    return mirror.fallback(url) if url and mirror else None
+
+
+def hitbox_payloads(data: FrameDataStore, char: str, move: str, index: int,
+                    media: MediaStore = None, mirror: Mirror = None):
+    '''
+    Builds the embed dicts for one hit of a move
+
+    When local_gif() finds a file the embed points at an attachment, which the sender has
+    to include (see HitboxEmbeds.render()).
+
+    Returns:
+        (fullspeed, slowmo), each an embed dict in the format Discord expects and the path
+        of the local gif it points at, None when it uses a url
+    '''
+    character = data.registry.get(char)
+    move_hits = data.move(char, move)
+    hit = move_hits[index]
+
+    # For every value listed in the hit adds the the information about the move
+    # e.g. Damage: 2%
+    desc = ''.join(f'{info}: {value}\n' for info, value in hit.info.items())
+    # If there are multiple hits then the embed title will specify the hit
+    hit_text = f' ({hit.name})' if len(move_hits) > 1 else ''
+
+    fullspeed = {
+        'type': 'rich',
+        'description': f'```\n{desc}```',
+        'color': character.color,
+        'author': {'name': f'{char} {move}{hit_text}', 'icon_url': character.icon},
+        'footer': {'text': FOOTER},
+    }
+    slowmo = dict(fullspeed)
+    paths = []
+    for payload, url, is_slowmo in ((fullspeed, hit.fullspeed, False), (slowmo, hit.slowmo, True)):
+        path = local_gif(data, char, move, index, is_slowmo, media, mirror)
+        if path:
+            url = f'attachment://{path.stem[:16]}{path.suffix}'
+        if url:
+            payload['image'] = {'url': url}
+        paths.append(path)
+    return (fullspeed, paths[0]), (slowmo, paths[1])
+
+
+class HitboxEmbeds:
+    '''
+    HitboxEmbeds
+
+        Memoizes ready-to-send embed dicts keyed by (character, move, hit index, slowmo),
+        together with the local gif the embed points at. Both gif speeds of a hit are built
+        together, so toggling speed is always a cache hit.
+
+        The mirror is a frozen copy of the index, a sync that changes which urls fail makes
+        the cog build a new HitboxEmbeds instead (see on_mirror_update).
+
+        Cached dicts are shared and never handed out directly: render() returns a fresh
+        discord.Embed with its own copies of the nested dicts, so callers can modify it freely.
+
+        Builds are single-flight: warm() runs in a thread while commands render on the event
+        loop, and a hit requested while another caller is building it waits for that build
+        instead of starting its own. coalesced counts those waits.
+    '''
+
+    def __init__(self, data: FrameDataStore, maxsize: int = 4096, media: MediaStore = None, mirror: Mirror = None):
+        self.data = data
+        self.media = media
+        self.mirror = mirror.frozen() if mirror else None
+        self.cache = LRUCache(maxsize)
+        self.lock = threading.Lock()
+        self.building = {}  # (char, move, index) -> Future of the build in progress
+        self.coalesced = 0
+
+    def payload(self, char: str, move: str, index: int, slowmo: bool = False) -> tuple:
+        '''(embed dict, local gif path or None) of one hit at one speed'''
+        with self.lock:  # warm() may be evicting from another thread
+            payload = self.cache.get((char, move, index, slowmo))
+        if payload is None:
+            payload = self.build(char, move, index)[slowmo]
+        return payload
+
+    def build(self, char: str, move: str, index: int) -> tuple:
+        '''Builds and caches both speeds of a hit, or waits for the caller already building them'''
+        key = (char, move, index)
+        with self.lock:
+            future = self.building.get(key)
+            owner = future is None
+            if owner:
+                future = self.building[key] = Future()
+            else:
+                self.coalesced += 1
+        if not owner:
+            return future.result()
+        try:
+            payloads = hitbox_payloads(self.data, char, move, index, self.media, self.mirror)
+            with self.lock:
+                self.cache.put((char, move, index, False), payloads[0])
+                self.cache.put((char, move, index, True), payloads[1])
+            future.set_result(payloads)
+            return payloads
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                del self.building[key]
+
+    def render(self, char: str, move: str, index: int, slowmo: bool = False) -> tuple:
+        '''
+        Returns:
+            (discord.Embed, discord.File of the local gif it points at or None when it uses a url),
+            from one cache lookup
+        '''
+        payload, path = self.payload(char, move, index, slowmo)
+        embed = discord.Embed.from_dict({k: v.copy() if isinstance(v, dict) else v for k, v in payload.items()})
+        # The path resolved with the embed, the mirror may have changed its mind since
+        file = discord.File(path, filename=payload['image']['url'][len('attachment://'):]) if path else None
+        return embed, file
+
+    def warm(self, hits: int = 1):
+        '''
+        Precomputes the first `hits` hits of every move at both speeds, up to the size of the cache
+
+        A command only ever shows hit 0, the others are built the first time their button
+        is pressed and memoized from then on.
+        '''
+        for (char, move), move_hits in self.data.hits.items():
+            for index in range(min(hits, len(move_hits))):
+                if (char, move, index, False) in self.cache.entries:
+                    continue
+                if len(self.cache) + 2 > self.cache.maxsize:
+                    return
+                self.build(char, move, index)
+
+    def rebased(self, reload: Reload) -> 'HitboxEmbeds':
+        '''
+        A cache for the reloaded store, keeping every entry of characters the reload did not touch
+
+        This cache is left as it is, anything still holding it keeps rendering the old data.
+        '''
+        new = HitboxEmbeds(reload.store, self.cache.maxsize, self.media, self.mirror)
+        with self.lock:  # warm() may still be filling this cache from a thread
+            entries = list(self.cache.entries.items())
+        for key, payload in entries:
+            if key[0] not in reload.characters:
+                new.cache.entries[key] = payload
+        new.cache.hits, new.cache.misses, new.cache.evictions = self.cache.hits, self.cache.misses, self.cache.evictions
+        return new
+
+    def clear(self):
+        self.cache.clear()
+
+    def stats(self) -> dict:
+        return dict(self.cache.stats(), coalesced=self.coalesced)
@@ -0,0 +1,251 @@
+import functools
+import json
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from utils.characters import CharacterRegistry, load_emotes
+from utils.hitdata import HitRecord
+from utils.snapshot import Snapshot, SnapshotError
+
+DATA_DIR = Path('data')
+
+
+class Hit(NamedTuple):
+    """A single hitbox of a move along with its gifs."""
+    name: str
+    info: dict            # e.g. {'Startup': '1-2', 'Damage': '2%'}
+    fullspeed: Optional[str]
+    slowmo: Optional[str]
+
+
+class Reload(NamedTuple):
+    """The result of re-parsing changed data files."""
+    store: 'FrameDataStore'
+    files: tuple          # paths that were re-parsed
+    entries: int          # hits, stats, characters and moves that were added, removed or changed
+    characters: frozenset # characters whose embeds need rebuilding
+    duration: float
+
+
+class FrameDataStore:
+    '''
+    FrameDataStore
+
+        Loads characters.json, moves.json, stats/stats.json and every info/{char}.json once
+        and keeps them indexed in memory so commands never touch the disk.
+
+        characters: character name -> {'id', 'color', 'icon'}
+        moves:      move name -> move slot id
+        hits:       (character, move) -> tuple of Hit
+        records:    (character, move) -> tuple of HitRecord, the parsed numbers of each hit
+        stats:      character name -> {'Stats', 'Embed Info'}
+        registry:   CharacterRegistry, resolves any name of a character to all of the above
+
+        A loaded store is never modified, reloaded() returns a new store instead so
+        anything still holding the old one keeps a consistent view of the data.
+    '''
+
+    def __init__(self, root: Path = DATA_DIR):
+        self.root = Path(root)
+        self.characters = {}
+        self.moves = {}
+        self.movesets = {}  # character -> tuple of move names, in file order
+        self.hits = {}
+        self.records = {}
+        self.stats = {}
+        self.registry = None
+        self.load_time = 0.0
+        self.source = None  # 'snapshot' or 'json'
+
+    def load(self, use_snapshot: bool = True):
+        '''Loads from the compiled snapshot when it is up to date, otherwise from the JSON'''
+        start = time.perf_counter()
+        if use_snapshot:
+            try:
+                self.load_snapshot(Snapshot(self.root))
+            except SnapshotError as e:
+                print(f'{e}, loading frame data from JSON...')
+                self.load_json()
+        else:
+            self.load_json()
+        self.registry = self.build_registry()
+        for problem in self.registry.problems:
+            print(f'Character names: {problem}')
+        self.load_time = time.perf_counter() - start
+        return self
+
+    def build_registry(self) -> CharacterRegistry:
+        return CharacterRegistry(self.characters, self.movesets, self.stats, load_emotes(self.root))
+
+    def load_snapshot(self, snapshot: Snapshot):
+        try:
+            self.characters = snapshot.read('characters')
+            self.moves = snapshot.read('moves')
+            self.stats = snapshot.read('stats')
+
+            self.movesets = {}
+            self.hits = {}
+            self.records = {}
+            for name in snapshot.names():
+                if name.startswith('info/'):
+                    self.index_character(name[len('info/'):], snapshot.read(name))
+        finally:
+            snapshot.close()
+        self.source = 'snapshot'
+
+    def load_json(self):
+        with open(self.root / 'characters.json', 'r') as c:
+            self.characters = json.load(c)
+        with open(self.root / 'moves.json', 'r') as m:
+            self.moves = json.load(m)
+        with open(self.root / 'stats' / 'stats.json', 'r') as s:
+            self.stats = json.load(s)
+
+        self.movesets = {}
+        self.hits = {}
+        self.records = {}
+        for path in sorted((self.root / 'info').glob('*.json')):
+            with open(path, 'r') as f:
+                self.index_character(path.stem, json.load(f))
+        self.source = 'json'
+
+    def index_character(self, char: str, charinfo: dict):
+        self.movesets[char] = tuple(charinfo)
+        for move, moveinfo in charinfo.items():
+            images = moveinfo.get('Images', {})
+            fullspeed = images.get('Full Speed', {})
+            slowmo = images.get('Slowmo', {})
+            self.hits[(char, move)] = tuple(
+                Hit(hit, info, fullspeed.get(hit), slowmo.get(hit))
+                for hit, info in moveinfo['Hitboxes'].items()
+            )
+            self.records[(char, move)] = tuple(
+                HitRecord(char, move, hit, info)
+                for hit, info in moveinfo['Hitboxes'].items()
+            )
+
+    def watched_files(self) -> dict:
+        '''Path -> mtime of every data file a reload can pick up'''
+        paths = [self.root / 'characters.json', self.root / 'moves.json', self.root / 'stats' / 'stats.json']
+        paths += (self.root / 'info').glob('*.json')
+        return {path: path.stat().st_mtime for path in paths if path.exists()}
+
+    def reloaded(self, paths) -> Reload:
+        '''
+        Re-parses only the given files
+
+        Returns:
+            a Reload with a new store that shares every untouched dict with this one
+        '''
+        start = time.perf_counter()
+        new = FrameDataStore(self.root)
+        new.characters = self.characters
+        new.moves = self.moves
+        new.stats = self.stats
+        new.movesets = dict(self.movesets)
+        new.hits = dict(self.hits)
+        new.records = dict(self.records)
+        new.source = self.source
+
+        entries = 0
+        characters = set()
+        for path in paths:
+            path = Path(path)
+            data = {}
+            if path.exists():
+                with open(path, 'r') as f:
+                    data = json.load(f)
+
+            if path.parent == self.root / 'info':
+                char = path.stem
+                old_hits = {(move, hit.name): hit for move in self.movesets.get(char, ()) for hit in self.hits[(char, move)]}
+                for move in new.movesets.pop(char, ()):
+                    del new.hits[(char, move)]
+                    del new.records[(char, move)]
+                if data:
+                    new.index_character(char, data)
+                new_hits = {(move, hit.name): hit for move in new.movesets.get(char, ()) for hit in new.hits[(char, move)]}
+                changed = _changed(old_hits, new_hits)
+                characters.update([char] if changed else [])
+            elif path == self.root / 'stats' / 'stats.json':
+                changed = _changed(self.stats, data)
+                new.stats = data
+            elif path.name == 'characters.json':
+                changed = _changed(self.characters, data)
+                characters.update(char for char in (set(self.characters) | set(data))
+                                  if self.characters.get(char) != data.get(char))
+                new.characters = data
+            elif path.name == 'moves.json':
+                changed = _changed(self.moves, data)
+                new.moves = data
+            else:
+                continue
+            entries += changed
+
+        new.registry = new.build_registry()
+        for problem in set(new.registry.problems) - set(self.registry.problems):
+            print(f'Character names: {problem}')
+        new.load_time = time.perf_counter() - start
+        return Reload(new, tuple(paths), entries, frozenset(characters), new.load_time)
+
+    def character(self, char: str) -> dict:
+        return self.characters[char]
+
+    def move(self, char: str, move: str) -> tuple:
+        return self.hits[(char, move)]
+
+    def charstats(self, char: str) -> dict:
+        return self.stats[char]
+
+    def move_name(self, move_id: int) -> Optional[str]:
+        '''Move with an id from moves.json, None when there is none'''
+        return self._move_names.get(move_id)
+
+    @functools.cached_property
+    def _move_names(self) -> dict:
+        return {move_id: move for move, move_id in self.moves.items()}
+
+    def __len__(self):
+        return sum(len(hits) for hits in self.hits.values())
+
+
+def _changed(old: dict, new: dict) -> int:
+    '''Number of keys added, removed or given a different value'''
+    return sum(1 for key in old.keys() | new.keys() if old.get(key) != new.get(key))
+
+
+def _benchmark(rounds: int = 200):
+    '''Compare the old per-command json.load path against a store lookup.'''
+    store = FrameDataStore().load()
+    print(f'Loaded {len(store.movesets)} characters / {len(store)} hits in {store.load_time * 1000:.1f} ms\n')
+
+    def per_call(fn):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            fn()
+        return (time.perf_counter() - start) / rounds * 1e6
+
+    def hitbox_before(char, move):
+        with open(store.root / 'characters.json', 'r') as c:
+            json.load(c)[char]
+        with open(store.root / 'info' / f'{char}.json', 'r') as f:
+            json.load(f)[move]['Hitboxes']
+
+    def stats_before(char):
+        with open(store.root / 'stats' / 'stats.json', 'r') as i:
+            json.load(i)[char]
+
+    print(f'{"command":<28}{"before (us)":>14}{"after (us)":>14}')
+    for char in store.movesets:
+        move = store.movesets[char][0]
+        before = per_call(lambda: hitbox_before(char, move))
+        after = per_call(lambda: (store.character(char), store.move(char, move)))
+        print(f'/{char.lower().replace(" ", ""):<27}{before:>14.1f}{after:>14.2f}')
+    before = per_call(lambda: stats_before('Goku'))
+    after = per_call(lambda: store.charstats('Goku'))
+    print(f'{"/stats":<28}{before:>14.1f}{after:>14.2f}')
+
+
+if __name__ == '__main__':
+    _benchmark()
@@ -0,0 +1,105 @@
+'''
+Full-text search over the hit notes
+
+    NotesIndex builds an inverted index over the text of every hit that isn't frame data:
+    the Notes, and the rare fields of the HitFields overflow ('Armor: 6-10 (Ground/Air)',
+    'Conditions: ...', 'Trap Time: 42 + damage/5, each mash removes 4 frames') with the field
+    name included, so 'armor' finds every hit with armor. Terms are lowercased words with a
+    light suffix strip ('holding' and 'holds' are 'hold'), without the most common words.
+
+    Hits are ranked by BM25: a term scores more the rarer it is across the roster and the
+    more often it appears in a hit's text, normalized by the length of that text. A query
+    only touches the postings of its own terms, one NumPy scatter-add per term.
+'''
+import math
+import re
+
+import numpy as np
+
+from utils.query import FrameTable
+
+K1 = 1.2    # how quickly repeating a term stops adding to the score
+B = 0.75    # how much longer texts are penalized
+STOPWORDS = frozenset('a an and are as at be by for from if in is it its of on or that the this to was with'.split())
+_WORD = re.compile(r'[a-z0-9]+')
+
+
+def stem(word: str) -> str:
+    for suffix in ('ing', 'ed', 'es', 's'):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def terms(text: str) -> list:
+    return [stem(word) for word in _WORD.findall(text.lower()) if word not in STOPWORDS]
+
+
+class NotesIndex:
+    '''
+    NotesIndex
+
+        table:    the FrameTable whose rows the results refer to
+        texts:    row -> lines of searchable text, the notes then 'Armor: ...' and the like
+        postings: term -> (rows, term frequencies), both NumPy arrays
+    '''
+
+    def __init__(self, table: FrameTable):
+        self.table = table
+        self.texts = {}
+        for row in range(len(table)):
+            notes = table.fields.get(row, 'Notes')
+            lines = [notes] if notes else []
+            lines += [f'{field}: {value}' for field, value in table.fields.overflow.get(row, {}).items()
+                      if isinstance(value, str) and value.strip()]
+            if lines:
+                self.texts[row] = lines
+
+        counts = {}
+        lengths = np.zeros(len(table), dtype=np.float32)
+        for row, lines in self.texts.items():
+            row_terms = terms('\n'.join(lines))
+            lengths[row] = len(row_terms)
+            for term in row_terms:
+                per_row = counts.setdefault(term, {})
+                per_row[row] = per_row.get(row, 0) + 1
+
+        documents = max(1, len(self.texts))
+        average = lengths.sum() / documents or 1.0
+        # The length part of BM25 only depends on the row, so it is computed once
+        self.norm = K1 * (1 - B + B * lengths / average)
+        self.postings = {}
+        self.idf = {}
+        for term, per_row in counts.items():
+            self.postings[term] = (np.fromiter(per_row, dtype=np.int32, count=len(per_row)),
+                                   np.fromiter(per_row.values(), dtype=np.float32, count=len(per_row)))
+            self.idf[term] = math.log(1 + (documents - len(per_row) + 0.5) / (len(per_row) + 0.5))
+
+    def __len__(self):
+        return len(self.texts)
+
+    def search(self, text: str):
+        '''
+        Returns:
+            (rows, scores) of the hits matching any term of the text, best first
+        '''
+        scores = np.zeros(len(self.table), dtype=np.float32)
+        for term in set(terms(text)):
+            if term not in self.postings:
+                continue
+            rows, tf = self.postings[term]
+            scores[rows] += self.idf[term] * tf * (K1 + 1) / (tf + self.norm[rows])
+        rows = np.flatnonzero(scores)
+        rows = rows[np.argsort(-scores[rows], kind='stable')]
+        return rows, scores[rows]
+
+    def highlight(self, row: int, text: str, width: int = 200) -> list:
+        '''The searchable lines of a row, cut to width, with the words matching the text in bold'''
+        wanted = set(terms(text))
+
+        def bold(match):
+            word = match.group()
+            return f'**{word}**' if stem(word.lower()) in wanted else word
+
+        return [re.sub(r'[A-Za-z0-9]+', bold, line if len(line) <= width else line[:width - 3] + '...')
+                for line in self.texts[row]]
@@ -0,0 +1,207 @@
+'''
+Stand-in Discord gateway
+
+    `python -m utils.gateway` serves just enough of the Discord REST API and gateway for the
+    bot to log in, identify its shards and receive its guilds, so the cluster launcher can be
+    run end to end without a real token:
+
+        python -m utils.gateway --port 8765 --shards 4 --guilds 200
+        python -m utils.cluster --clusters 2 --api http://127.0.0.1:8765
+
+    Every guild is sent to the shard Discord would send it to, (guild id >> 22) % shards.
+    GET /_status returns the identifies and open connections of every shard, which is how
+    a test checks that each shard is connected exactly once after workers are killed.
+    Unknown REST routes answer 404, so anything the bot posts (logs, errors) is dropped.
+'''
+import asyncio
+import itertools
+import json
+import time
+
+from aiohttp import WSMsgType, web
+
+API = '/api/v10'
+BOT_ID = 1349718416956588083
+OWNER_ID = 1000
+HEARTBEAT_INTERVAL = 41250
+
+# Gateway opcodes
+DISPATCH, HEARTBEAT, IDENTIFY, RESUME, REQUEST_MEMBERS, INVALID_SESSION, HELLO, HEARTBEAT_ACK = 0, 1, 2, 6, 8, 9, 10, 11
+
+
+def member(user_id: int) -> dict:
+    return {'user': user(user_id, f'user{user_id}'), 'nick': None, 'roles': [], 'joined_at': '2025-01-01T00:00:00+00:00',
+            'deaf': False, 'mute': False, 'flags': 0}
+
+
+def respond(data: dict) -> web.Response:
+    # discord.py only decodes a body sent as exactly 'application/json', without a charset
+    return web.Response(body=json.dumps(data).encode(), headers={'Content-Type': 'application/json'})
+
+
+def user(user_id: int, name: str, bot: bool = False) -> dict:
+    return {'id': str(user_id), 'username': name, 'discriminator': '0', 'global_name': None,
+            'avatar': None, 'bot': bot, 'flags': 0, 'public_flags': 0}
+
+
+def guild(guild_id: int, index: int, members: int) -> dict:
+    return {
+        'id': str(guild_id), 'name': f'Guild {index}', 'icon': None, 'owner_id': str(OWNER_ID),
+        'member_count': members, 'large': members > 250, 'unavailable': False,
+        'roles': [], 'channels': [], 'members': [], 'emojis': [], 'stickers': [], 'features': [],
+        'threads': [], 'presences': [], 'voice_states': [], 'stage_instances': [],
+        'guild_scheduled_events': [], 'premium_tier': 0, 'preferred_locale': 'en-US',
+        'afk_timeout': 300, 'verification_level': 0, 'default_message_notifications': 0,
+        'explicit_content_filter': 0, 'mfa_level': 0, 'nsfw_level': 0, 'system_channel_flags': 0,
+    }
+
+
+class StandInGateway:
+    def __init__(self, shards: int = 1, guilds: int = 10, members: int = 50, host: str = '127.0.0.1', port: int = 8765):
+        self.shards = shards
+        self.host = host
+        self.port = port
+        # Snowflakes spread over the shards the way Discord spreads real ones, guild sizes
+        # from members / 2 to members * 1.5
+        self.guilds = [guild(((i + 1) << 22) | i, i, members // 2 + (i * 37) % (members + 1)) for i in range(guilds)]
+        # Users are drawn from a pool smaller than the member total, so many share guilds
+        self.users = max([1, sum(g['member_count'] for g in self.guilds) * 2 // 3]
+                         + [g['member_count'] for g in self.guilds])
+        self.identifies = {}   # shard id -> number of IDENTIFYs
+        self.connections = {}  # shard id -> open sockets
+        self.sessions = itertools.count(1)
+        self.runner = None
+
+    @property
+    def url(self) -> str:
+        return f'http://{self.host}:{self.port}'
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/', self.gateway)
+        app.router.add_get(f'{API}/gateway/bot', self.gateway_bot)
+        app.router.add_get(f'{API}/gateway', self.gateway_bot)
+        app.router.add_get(f'{API}/users/@me', self.me)
+        app.router.add_get(f'{API}/oauth2/applications/@me', self.application)
+        app.router.add_get('/_status', self.status)
+        return app
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app())
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+    def member_chunks(self, guild_id: str) -> list:
+        '''Every member of a guild, in chunks of 1000 like Discord sends them'''
+        index = next(i for i, g in enumerate(self.guilds) if g['id'] == str(guild_id))
+        count = self.guilds[index]['member_count']
+        members = [member(10_000 + (index * 7919 + k) % self.users) for k in range(count)]
+        return [members[i:i + 1000] for i in range(0, count, 1000)] or [[]]
+
+    ### REST ###
+
+    async def gateway_bot(self, request: web.Request):
+        return respond({
+            'url': f'ws://{self.host}:{self.port}', 'shards': self.shards,
+            'session_start_limit': {'total': 1000, 'remaining': 1000, 'reset_after': 0, 'max_concurrency': 1},
+        })
+
+    async def me(self, request: web.Request):
+        return respond(user(BOT_ID, 'SSF2 Frame Data', bot=True))
+
+    async def application(self, request: web.Request):
+        return respond({
+            'id': str(BOT_ID), 'name': 'SSF2 Frame Data', 'description': '', 'icon': None,
+            'bot_public': True, 'bot_require_code_grant': False, 'owner': user(OWNER_ID, 'owner'),
+            'verify_key': '', 'flags': 0, 'interactions_endpoint_url': None,
+        })
+
+    async def status(self, request: web.Request):
+        return respond({
+            'shards': self.shards,
+            'identifies': self.identifies,
+            'connections': {shard: len(sockets) for shard, sockets in self.connections.items()},
+        })
+
+    ### Gateway ###
+
+    async def gateway(self, request: web.Request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        seq = itertools.count(1)
+        shard = None
+
+        async def dispatch(event: str, data: dict):
+            await ws.send_str(json.dumps({'op': DISPATCH, 't': event, 's': next(seq), 'd': data}))
+
+        await ws.send_str(json.dumps({'op': HELLO, 'd': {'heartbeat_interval': HEARTBEAT_INTERVAL}}))
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    break
+                payload = json.loads(msg.data)
+                op, data = payload['op'], payload.get('d')
+                if op == HEARTBEAT:
+                    await ws.send_str(json.dumps({'op': HEARTBEAT_ACK}))
+                elif op == IDENTIFY:
+                    shard_id, shard_count = data.get('shard', (0, 1))
+                    if shard_count != self.shards:
+                        await ws.close(code=4010, message=b'Invalid shard')
+                        break
+                    shard = shard_id
+                    self.identifies[shard] = self.identifies.get(shard, 0) + 1
+                    self.connections.setdefault(shard, set()).add(ws)
+                    owned = [g for g in self.guilds if (int(g['id']) >> 22) % self.shards == shard]
+                    await dispatch('READY', {
+                        'v': 10, 'user': user(BOT_ID, 'SSF2 Frame Data', bot=True),
+                        'guilds': [{'id': g['id'], 'unavailable': True} for g in owned],
+                        'session_id': f'session-{next(self.sessions)}', 'shard': [shard_id, shard_count],
+                        'resume_gateway_url': f'ws://{self.host}:{self.port}',
+                        'application': {'id': str(BOT_ID), 'flags': 0},
+                    })
+                    for g in owned:
+                        await dispatch('GUILD_CREATE', g)
+                elif op == RESUME:
+                    # Sessions aren't kept, the client identifies again
+                    await ws.send_str(json.dumps({'op': INVALID_SESSION, 'd': False}))
+                elif op == REQUEST_MEMBERS:
+                    chunks = self.member_chunks(data['guild_id'])
+                    for index, members in enumerate(chunks):
+                        await dispatch('GUILD_MEMBERS_CHUNK', {
+                            'guild_id': data['guild_id'], 'members': members, 'chunk_index': index,
+                            'chunk_count': len(chunks), 'nonce': data.get('nonce'),
+                        })
+        finally:
+            if shard is not None:
+                self.connections[shard].discard(ws)
+        return ws
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Serve a stand-in Discord gateway for local cluster tests')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--shards', type=int, default=4)
+    parser.add_argument('--guilds', type=int, default=100)
+    parser.add_argument('--members', type=int, default=50, help='average members per guild')
+    args = parser.parse_args()
+
+    async def main():
+        gateway = StandInGateway(args.shards, args.guilds, args.members, args.host, args.port)
+        await gateway.start()
+        print(f'Stand-in gateway on {gateway.url}, {args.shards} shards, {args.guilds} guilds, '
+              f'{sum(g["member_count"] for g in gateway.guilds):,} members')
+        started = time.monotonic()
+        while True:
+            await asyncio.sleep(30)
+            print(f'{time.monotonic() - started:.0f} s: identifies {gateway.identifies}')
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
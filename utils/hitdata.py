@@ -0,0 +1,253 @@
+'''
+Numeric model of the hit fields in data/info/*.json
+
+    The JSON keeps every value as the string shown to users, e.g.
+        "Startup": "1-2", "Active": "2-5, 8-9", "Damage": "0.7% each hit"
+    HitRecord turns one hit into frame windows and floats that can be compared,
+    while keeping the original strings for display.
+
+    `python -m utils.hitdata` prints parse coverage and every value that could not be parsed.
+'''
+import math
+import re
+from array import array
+from functools import lru_cache
+
+from utils.schema import canonical
+
+# Frame window fields, in the order they are stored in HitRecord.frames
+WINDOWS = ('Startup', 'Active', 'Endlag', 'Landing Lag', 'Autocancel')
+OPEN_END = 0xFFFF  # '12+' is stored as (12, OPEN_END)
+NAN = float('nan')
+
+_SIMPLE = re.compile(r'(\d+)(?:-(\d+))?')
+_NOTE = re.compile(r'\([^)]*\)')
+_SEPARATOR = re.compile(r'[,/]|(\.\.\.)')
+_INTERVAL = re.compile(r'(\d+)\s*(?:-\s*(\d+))?\s*(\+)?')
+_PERCENT = re.compile(r'(\d+(?:\.\d+)?)\s*%')
+_NUMBER = re.compile(r'\d+(?:\.\d+)?')
+
+
+@lru_cache(maxsize=4096)
+def parse_frames(value: str):
+    '''
+    Parses a frame window like '3-5', '2-5, 8-9', '12+' or '1-2/18'
+
+    Parenthesised notes are ignored and '...' covers the frames between its neighbours.
+
+    Returns:
+        a sorted tuple of (start, end) tuples with overlapping intervals merged,
+        or None if the value isn't a frame window (e.g. 'Loop', '15 frames')
+    '''
+    simple = _SIMPLE.fullmatch(value)
+    if simple:  # Most values are a single '3-5' or '7'
+        start = int(simple.group(1))
+        end = int(simple.group(2) or start)
+        return ((start, end),) if start <= end else None
+
+    tokens = _SEPARATOR.split(_NOTE.sub('', value))
+    intervals = []
+    gap = False
+    for token in tokens:
+        if token is None:
+            continue
+        token = token.strip()
+        if not token:
+            continue
+        if token == '...':
+            gap = True
+            continue
+        match = _INTERVAL.fullmatch(token)
+        if not match:
+            return None
+        start = int(match.group(1))
+        end = OPEN_END if match.group(3) else int(match.group(2) or start)
+        if end < start:
+            return None
+        if gap and intervals:
+            intervals.append((intervals[-1][1] + 1, start - 1))
+        gap = False
+        intervals.append((start, end))
+    if not intervals or gap:
+        return None
+
+    merged = []
+    for start, end in sorted(i for i in intervals if i[0] <= i[1]):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+        else:
+            merged.append((start, end))
+    return tuple(merged)
+
+
+@lru_cache(maxsize=4096)
+def parse_damage(value: str) -> float:
+    '''
+    The highest single hit damage in a damage string
+
+        '4%, 7%' -> 7.0, '3x 2%, 5%' -> 5.0, '0.7% each hit' -> 0.7, '9' -> 9.0
+        Formulas without a percentage like '8 + 4*(charge/45)' give nan
+    '''
+    percents = _PERCENT.findall(value)
+    if percents:
+        return max(map(float, percents))
+    if _NUMBER.fullmatch(value.strip()):
+        return float(value)
+    return NAN
+
+
+@lru_cache(maxsize=4096)
+def parse_angle(value: str) -> float:
+    '''The first angle in an angle string: '270/45' -> 270.0, 'Autolink, 45' -> 45.0'''
+    match = _NUMBER.search(value)
+    return float(match.group()) if match else NAN
+
+
+@lru_cache(maxsize=4096)
+def _encode_windows(values: tuple) -> tuple:
+    '''The HitRecord.frames layout for the raw strings of each WINDOWS field'''
+    frames = []
+    for value in values:
+        intervals = [(s, min(e, OPEN_END)) for s, e in parse_frames(value) or () if s < OPEN_END] if value else []
+        frames.append(len(intervals))
+        for start, end in intervals:
+            frames.extend((start, end))
+    return tuple(frames)
+
+
+def _text(value) -> str:
+    '''A raw value as the string users see, the JSON sometimes has a bare number like "Damage": 3'''
+    return value if value is None or isinstance(value, str) else str(value)
+
+
+class HitRecord:
+    '''
+    One hit of a move in numeric form
+
+        frames holds the five frame windows back to back in a single unsigned short array,
+        each window as a count followed by its (start, end) pairs. A count of 0 means the
+        field is missing or couldn't be parsed. Landing Lag is a frame count, so '8' is (8, 8).
+
+        damage and angle are nan when missing or unparseable. raw is the hit's original dict,
+        fields the same values under the canonical field names of utils.schema ('Angles' is
+        'Angle', 'IASA' is 'FAF'), which is raw itself for the hits that spell them that way.
+    '''
+    __slots__ = ('char', 'move', 'hit', 'frames', 'damage', 'angle', 'raw', 'fields')
+
+    def __init__(self, char: str, move: str, hit: str, raw: dict):
+        self.char = char
+        self.move = move
+        self.hit = hit
+        self.raw = raw
+        self.fields = fields = canonical(raw)
+
+        self.frames = array('H', _encode_windows(tuple(_text(fields.get(field)) for field in WINDOWS)))
+
+        damage = _text(fields.get('Damage'))
+        if not damage:
+            # Moves with a sweetspot/sourspot/tipper list those instead of Damage
+            spots = [parse_damage(_text(v)) for k, v in fields.items() if k.endswith('Damage') and k != 'Self Damage' and _text(v)]
+            spots = [d for d in spots if not math.isnan(d)]
+            self.damage = max(spots) if spots else NAN
+        else:
+            self.damage = parse_damage(damage)
+        angle = _text(fields.get('Angle'))
+        self.angle = parse_angle(angle) if angle else NAN
+
+    def window(self, field: str):
+        '''The (start, end) intervals of a frame window field'''
+        i = 0
+        for name in WINDOWS:
+            count = self.frames[i]
+            if name == field:
+                return [(self.frames[j], self.frames[j + 1]) for j in range(i + 1, i + 1 + 2 * count, 2)]
+            i += 1 + 2 * count
+        raise KeyError(field)
+
+    @property
+    def first_active(self) -> int:
+        '''
+        Frame the first hitbox comes out, or 0 when unknown
+
+        Without a Startup field the Active window counts from something other than the start
+        of the move, like landing or a projectile spawning, so the startup is unknown.
+        '''
+        if not self.fields.get('Startup'):
+            return 0
+        active = self.window('Active')
+        if active:
+            return active[0][0]
+        startup = self.window('Startup')
+        if startup and startup[-1][1] != OPEN_END:
+            return startup[-1][1] + 1
+        return 0
+
+    @property
+    def last_frame(self) -> int:
+        '''Last frame of the move, or 0 when unknown or open ended (or relative, see first_active)'''
+        if not self.fields.get('Startup'):
+            return 0
+        last = 0
+        for field in ('Startup', 'Active', 'Endlag'):
+            window = self.window(field)
+            if window:
+                last = max(last, window[-1][1])
+        return 0 if last == OPEN_END else last
+
+    @property
+    def endlag(self) -> int:
+        '''Number of endlag frames, or 0 when unknown'''
+        window = self.window('Endlag')
+        if not window or window[-1][1] == OPEN_END:
+            return 0
+        return window[-1][1] - window[0][0] + 1
+
+    def __repr__(self):
+        return f'<HitRecord {self.char} {self.move} ({self.hit}) first_active={self.first_active} damage={self.damage}>'
+
+
+def failures(record: HitRecord):
+    '''(field, raw value) for every field of the record that was present but not parsed'''
+    i = 0
+    for field in WINDOWS:
+        count = record.frames[i]
+        if record.fields.get(field) and not count:
+            yield field, record.fields[field]
+        i += 1 + 2 * count
+    if record.fields.get('Damage') and math.isnan(record.damage):
+        yield 'Damage', record.fields['Damage']
+    if record.fields.get('Angle') and math.isnan(record.angle):
+        yield 'Angle', record.fields['Angle']
+
+
+def coverage(records) -> dict:
+    '''field -> (present, parsed) over the given records'''
+    report = {field: [0, 0] for field in (*WINDOWS, 'Damage', 'Angle')}
+    for record in records:
+        failed = {field for field, _ in failures(record)}
+        for field in report:
+            if record.fields.get(field):
+                report[field][0] += 1
+                report[field][1] += field not in failed
+    return {field: tuple(counts) for field, counts in report.items()}
+
+
+if __name__ == '__main__':
+    import sys
+
+    from utils.framedata import FrameDataStore
+
+    store = FrameDataStore().load()
+    records = [record for move in store.records.values() for record in move]
+
+    print(f'{"field":<14}{"present":>9}{"parsed":>9}{"coverage":>10}')
+    for field, (present, parsed) in coverage(records).items():
+        print(f'{field:<14}{present:>9}{parsed:>9}{parsed / max(present, 1):>10.1%}')
+
+    size = sum(sys.getsizeof(r) + sys.getsizeof(r.frames) for r in records) / len(records)
+    print(f'\n{len(records)} records, {size:.0f} bytes per record (excluding the shared raw strings)\n')
+
+    print('Could not parse:')
+    for record in records:
+        for field, value in failures(record):
+            print(f'  {record.char} / {record.move} / {record.hit}: {field} = {value!r}')
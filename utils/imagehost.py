@@ -0,0 +1,148 @@
+'''
+Stand-in image host
+
+    `python -m utils.imagehost` serves urls that answer the way imgur does, so the media
+    mirror (utils.mirror) can be run end to end without touching the internet:
+
+        /media/{name}   200 with an ETag and Last-Modified, 304 to a matching conditional request
+        /gone/{name}    302 to /removed.png, which is how imgur answers a removed image
+        /error/{name}   500
+        anything else   404
+
+    `python -m utils.imagehost --check` starts the host, syncs a mirror in a temporary folder
+    against it twice, changes one image and syncs again, and prints each report: the first
+    run fetches everything, the second only gets 304s, the third one update.
+    GET /_status returns the number of answers sent per status code.
+'''
+import asyncio
+import hashlib
+import json
+import time
+from collections import Counter
+from email.utils import formatdate
+
+from aiohttp import web
+
+# The smallest valid GIF and PNG, the mirror only hashes and stores the bytes
+GIF = bytes.fromhex('47494638396101000100800000000000ffffff21f90401000000002c00000000010001000002024401003b')
+PNG = bytes.fromhex('89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+                    '1f15c4890000000d49444154789c6360000002000001e221bc330000000049454e44ae426082')
+
+
+class StandInImageHost:
+    def __init__(self, images: int = 5, host: str = '127.0.0.1', port: int = 8766):
+        self.host = host
+        self.port = port
+        self.images = {}  # name -> (body, etag, last modified)
+        for i in range(images):
+            self.put(f'{i}.gif', GIF + bytes([i]))
+        self.answers = Counter()  # status -> count
+        self.runner = None
+
+    @property
+    def url(self) -> str:
+        return f'http://{self.host}:{self.port}'
+
+    def put(self, name: str, body: bytes):
+        '''Adds or replaces an image, with a new ETag and Last-Modified'''
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        self.images[name] = (body, etag, formatdate(time.time(), usegmt=True))
+
+    def urls(self) -> list:
+        '''Every image, plus one url for each of removed, failing and missing'''
+        return [f'{self.url}/media/{name}' for name in self.images] + [
+            f'{self.url}/gone/removed.gif', f'{self.url}/error/failing.gif', f'{self.url}/missing.gif']
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self.count])
+        app.router.add_get('/media/{name}', self.media)
+        app.router.add_get('/gone/{name}', self.gone)
+        app.router.add_get('/removed.png', self.removed)
+        app.router.add_get('/error/{name}', self.error)
+        app.router.add_get('/_status', self.status)
+        return app
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app())
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+    @web.middleware
+    async def count(self, request: web.Request, handler):
+        try:
+            response = await handler(request)
+        except web.HTTPException as e:  # The 404s of unknown routes and the redirect
+            self.answers[e.status] += 1
+            raise
+        self.answers[response.status] += 1
+        return response
+
+    async def media(self, request: web.Request) -> web.Response:
+        if request.match_info['name'] not in self.images:
+            raise web.HTTPNotFound()
+        body, etag, modified = self.images[request.match_info['name']]
+        headers = {'ETag': etag, 'Last-Modified': modified}
+        if request.headers.get('If-None-Match') == etag or (
+                'If-None-Match' not in request.headers and request.headers.get('If-Modified-Since') == modified):
+            return web.Response(status=304, headers=headers)
+        return web.Response(body=body, headers=headers, content_type='image/gif')
+
+    async def gone(self, request: web.Request):
+        raise web.HTTPFound('/removed.png')
+
+    async def removed(self, request: web.Request) -> web.Response:
+        return web.Response(body=PNG, content_type='image/png')
+
+    async def error(self, request: web.Request) -> web.Response:
+        return web.Response(status=500, text='Internal Server Error')
+
+    async def status(self, request: web.Request) -> web.Response:
+        return web.Response(text=json.dumps(dict(self.answers)), content_type='application/json')
+
+
+if __name__ == '__main__':
+    import argparse
+    import tempfile
+
+    from utils.mirror import Mirror
+
+    parser = argparse.ArgumentParser(description='Serve a stand-in image host for local mirror tests')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--images', type=int, default=5)
+    parser.add_argument('--check', action='store_true', help='sync a temporary mirror against it and exit')
+    args = parser.parse_args()
+
+    async def check(host: StandInImageHost):
+        with tempfile.TemporaryDirectory() as folder:
+            mirror = Mirror(folder)
+            for run in ('first sync', 'unchanged', 'one image changed'):
+                if run == 'one image changed':
+                    host.put('0.gif', GIF + b'changed')
+                report = await mirror.sync(host.urls())
+                print(f'{run}: ' + ', '.join(f'{len(urls)} {outcome}' for outcome, urls in sorted(report.items())))
+            print(f'dead: {", ".join(mirror.dead())}')
+        print(f'answers: {dict(sorted(host.answers.items()))}')
+
+    async def main():
+        host = StandInImageHost(args.images, args.host, args.port)
+        await host.start()
+        if args.check:
+            try:
+                await check(host)
+            finally:
+                await host.stop()
+            return
+        print(f'Stand-in image host on {host.url}, try:')
+        for url in host.urls():
+            print(f'    {url}')
+        while True:
+            await asyncio.sleep(3600)
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
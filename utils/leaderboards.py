@@ -0,0 +1,75 @@
+'''
+Per move slot leaderboards
+
+    For every move slot (Jab, Neutral Air, ...) and stat, the whole roster is ranked once
+    when the data is loaded, so a request is a dict lookup and a slice.
+
+    Each character appears once per board, with its best hit for that stat.
+    Ties share a rank (1, 2, 2, 4) and are listed alphabetically. Characters whose hits
+    couldn't be parsed for the stat come after the ranked entries, without a rank.
+    Hits without a Startup field (landing hits, projectiles) count their frames from
+    landing or spawning, so they have no startup or total and are never a best hit for those.
+'''
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from utils.hitdata import HitRecord
+from utils.query import FrameTable
+
+# stat -> whether lower is better
+STATS = {
+    'startup': True,
+    'endlag': True,
+    'total': True,
+    'damage': False,
+}
+
+
+class Entry(NamedTuple):
+    rank: Optional[int]   # None when the stat is unknown
+    char: str
+    record: HitRecord
+    value: float
+
+
+class Leaderboards:
+    def __init__(self, table: FrameTable):
+        self.table = table
+        self.boards = {}  # (move, stat) -> tuple of Entry
+        names = np.array(table.characters)
+        # Alphabetical order of each character id, used to break ties
+        alphabetical = np.argsort(np.argsort(names))
+
+        for move_id, move in enumerate(table.moves):
+            rows = np.flatnonzero(table.move == move_id)
+            for stat, ascending in STATS.items():
+                values = table.columns[stat][rows]
+                key = values if ascending else -values
+                # lexsort sorts by the last key first, nan goes to the end
+                order = rows[np.lexsort((alphabetical[table.char[rows]], key))]
+                self.boards[(move, stat)] = self.rank(order, stat)
+
+    def rank(self, order, stat: str) -> tuple:
+        entries = []
+        seen = set()
+        previous = None
+        rank = 0
+        for row in order:
+            record = self.table.records[row]
+            if record.char in seen:
+                continue
+            seen.add(record.char)
+            value = float(self.table.columns[stat][row])
+            if np.isnan(value):
+                entries.append(Entry(None, record.char, record, value))
+                continue
+            if value != previous:
+                rank = len(entries) + 1
+                previous = value
+            entries.append(Entry(rank, record.char, record, value))
+        return tuple(entries)
+
+    def top(self, move: str, stat: str, count: int = None) -> tuple:
+        board = self.boards.get((move, stat), ())
+        return board if count is None else board[:count]
@@ -0,0 +1,179 @@
+import asyncio
+import os
+import traceback
+from collections import deque
+
+import aiohttp
+import discord
+from discord.ext import commands
+
+MESSAGE_LIMIT = 2000  # Discord's message length limit
+
+
+def chunk(lines, limit: int = MESSAGE_LIMIT):
+    '''Joins lines into as few messages as possible, each under the limit'''
+    message = ''
+    for line in lines:
+        line = line[:limit - 1]
+        if message and len(message) + len(line) + 1 > limit:
+            yield message
+            message = ''
+        message += line + '\n'
+    if message:
+        yield message
+
+
+class ChannelLog:
+    '''
+    ChannelLog
+
+        Queues log lines and posts them to a Discord channel in batches, so logging
+        never adds REST calls to an interaction. The channel is resolved once.
+
+        A batch is sent when batch_size lines are waiting or every interval seconds.
+        When more than max_pending lines pile up the rest are counted and summarized
+        in the next batch instead of being queued.
+    '''
+
+    def __init__(self, bot: commands.Bot, channel_id: int, *, batch_size: int = 20,
+                 interval: float = 10.0, max_pending: int = 500):
+        self.bot = bot
+        self.channel_id = int(channel_id)
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_pending = max_pending
+        self.channel = None
+        self.pending = deque()
+        self.dropped = 0
+        self.sent = 0
+        self.wake = asyncio.Event()
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    def log(self, line: str):
+        if len(self.pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        self.pending.append(line)
+        if len(self.pending) >= self.batch_size:
+            self.wake.set()
+
+    async def run(self):
+        await self.bot.wait_until_ready()
+        while True:
+            try:
+                await asyncio.wait_for(self.wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:  # Anything escaping would end the task and every later line with it
+                print(f'Log flush to {self.channel_id} failed: {e!r}')
+
+    async def get_channel(self):
+        if self.channel is None:
+            self.channel = self.bot.get_channel(self.channel_id) or await self.bot.fetch_channel(self.channel_id)
+        return self.channel
+
+    async def flush(self):
+        if not self.pending and not self.dropped:
+            return
+        lines = list(self.pending)
+        self.pending.clear()
+        if self.dropped:
+            lines.append(f'... and {self.dropped:,} more not logged (queue full)')
+            self.dropped = 0
+
+        try:
+            channel = await self.get_channel()
+            for message in chunk(lines):
+                await channel.send(message)
+            self.sent += len(lines)
+        except (discord.DiscordException, aiohttp.ClientError, OSError, asyncio.TimeoutError) as e:
+            print(f'Failed to send {len(lines)} log lines to {self.channel_id}: {e!r}')
+
+    async def close(self):
+        '''Stops the background task and sends whatever is still queued'''
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+
+class ErrorReporter:
+    '''
+    ErrorReporter
+
+        Groups errors by fingerprint (exception type and the line that raised it) and
+        reports each fingerprint at most once per window, with how often it happened,
+        where it was first seen and a sample stack. At most max_reports fingerprints are
+        reported per window, the rest are summarized in one line.
+
+        report() only updates counters, so it never slows down the failing interaction.
+    '''
+
+    def __init__(self, log: ChannelLog, *, window: float = 60.0, max_reports: int = 10):
+        self.log = log
+        self.window = window
+        self.max_reports = max_reports
+        self.errors = {}  # fingerprint -> [count, first context, sample stack]
+        self.task = None
+
+    @staticmethod
+    def fingerprint(error: BaseException) -> tuple:
+        frames = traceback.extract_tb(error.__traceback__)
+        if not frames:
+            return type(error).__name__, 'unknown'
+        frame = frames[-1]
+        return type(error).__name__, f'{os.path.relpath(frame.filename)}:{frame.lineno}'
+
+    def report(self, error: BaseException, context: str = ''):
+        key = self.fingerprint(error)
+        entry = self.errors.get(key)
+        if entry is None:
+            stack = ''.join(traceback.format_exception(type(error), error, error.__traceback__))
+            self.errors[key] = [1, context, stack]
+        else:
+            entry[0] += 1
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.window)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f'Error report failed: {e!r}')
+
+    def flush(self):
+        '''Hands one report per fingerprint seen this window to the log'''
+        errors, self.errors = self.errors, {}
+        ranked = sorted(errors.items(), key=lambda item: item[1][0], reverse=True)
+        for (name, location), (count, context, stack) in ranked[:self.max_reports]:
+            times = f' x{count:,}' if count > 1 else ''
+            header = f'**{name}** at `{location}`{times} in the last {self.window:g}s'
+            if context:
+                header += f' (first: {context})'
+            # Keep the end of the stack, it has the line that raised
+            room = MESSAGE_LIMIT - len(header) - 20
+            self.log.log(f'{header}\n```py\n{stack[-room:]}```')
+        if len(ranked) > self.max_reports:
+            rest = sum(entry[0] for _, entry in ranked[self.max_reports:])
+            self.log.log(f'... and {len(ranked) - self.max_reports} more kinds of errors ({rest:,} total)')
+
+    async def close(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.flush()
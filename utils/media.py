@@ -0,0 +1,254 @@
+'''
+Content-addressed media store
+
+    `python -m utils.media` scans data/images/{character}/{Full Speed,Slowmo}/*.gif and writes
+    data/media/:
+        objects/ab/abcdef....gif   one file per distinct sha256, hard linked when possible
+        manifest.json              what every object is and which hit it shows
+
+    The gif file names don't follow one scheme ('uthrow.gif', 'up-throw.gif', 'UpThrow.gif',
+    'Jab-JabCombo.gif'), so each file is matched to a hit of the character by comparing its
+    words with the move and hit names, after expanding the usual abbreviations (nair, fsmash,
+    up-b, ...). Hits whose gif url already points into data/images are matched by that url
+    first. data/images/overrides.json pins the files that can't be matched either way:
+        {"Krystal": {"dsmash-quake": ["Down Smash", "Shockwave"]}}
+
+    Byte-identical files are stored once. Files with the same dimensions, frame count and
+    duration are reported as likely duplicates, which is how re-encoded copies show up.
+'''
+import hashlib
+import json
+import os
+import re
+import shutil
+import struct
+from pathlib import Path
+from typing import NamedTuple, Optional
+from urllib.parse import unquote
+
+from utils.framedata import DATA_DIR, FrameDataStore
+
+IMAGES_DIR = DATA_DIR / 'images'
+MEDIA_DIR = DATA_DIR / 'media'
+MANIFEST_NAME = 'manifest.json'
+SPEEDS = ('Full Speed', 'Slowmo')
+MIN_SCORE = 0.5
+
+ABBREVIATIONS = {
+    'nair': 'neutral air', 'fair': 'forward air', 'bair': 'back air', 'uair': 'up air', 'dair': 'down air',
+    'zair': 'z air',
+    'ftilt': 'forward tilt', 'utilt': 'up tilt', 'dtilt': 'down tilt',
+    'fsmash': 'forward smash', 'usmash': 'up smash', 'dsmash': 'down smash',
+    'fthrow': 'forward throw', 'bthrow': 'back throw', 'uthrow': 'up throw', 'dthrow': 'down throw',
+    'dashattack': 'dash attack', 'jabcombo': 'jab combo', 'jabrapid': 'rapid jab',
+    'b': 'special', 'aerial': 'air', 'gif': '',
+}
+
+
+class GifInfo(NamedTuple):
+    width: int
+    height: int
+    frames: int
+    duration_ms: int
+
+
+class Asset(NamedTuple):
+    digest: str
+    path: Path
+    info: dict
+
+
+def gif_info(data: bytes) -> GifInfo:
+    '''Reads the size, frame count and duration of a gif without decoding any pixels'''
+    if data[:6] not in (b'GIF87a', b'GIF89a'):
+        raise ValueError('not a gif')
+    width, height, flags = struct.unpack_from('<HHB', data, 6)
+    pos = 13
+    if flags & 0x80:  # global color table
+        pos += 3 << ((flags & 7) + 1)
+
+    frames = duration = delay = 0
+    while pos < len(data):
+        block = data[pos]
+        if block == 0x3B:  # trailer
+            break
+        if block == 0x21:  # extension
+            label = data[pos + 1]
+            pos += 2
+            if label == 0xF9:  # graphic control, holds the frame delay in 1/100 s
+                delay = struct.unpack_from('<H', data, pos + 2)[0]
+        elif block == 0x2C:  # image
+            frames += 1
+            duration += delay * 10
+            delay = 0
+            local_flags = data[pos + 9]
+            pos += 10
+            if local_flags & 0x80:
+                pos += 3 << ((local_flags & 7) + 1)
+            pos += 1  # LZW minimum code size
+        else:
+            raise ValueError(f'unexpected block {block:#x} at byte {pos}')
+        # Skip the data sub-blocks
+        while data[pos]:
+            pos += data[pos] + 1
+        pos += 1
+    return GifInfo(width, height, frames, duration)
+
+
+def words(text: str) -> frozenset:
+    '''Normalized words of a file stem or hit name: 'NeutralSpecial-Hurtbox' -> {neutral, special, hurtbox}'''
+    text = re.sub(r'([a-z])([A-Z0-9])', r'\1 \2', text)
+    text = re.sub(r'([0-9])([a-zA-Z])', r'\1 \2', text)
+    text = re.sub(r'gif$', '', text)
+    result = set()
+    for word in re.split(r'[^a-z0-9]+', text.lower()):
+        result.update(ABBREVIATIONS.get(word, word).split())
+    return frozenset(filter(None, result))
+
+
+def score(file_words: frozenset, hit_words: frozenset) -> float:
+    return len(file_words & hit_words) / len(file_words | hit_words)
+
+
+def match_files(data: FrameDataStore, char: str, stems: list, overrides: dict) -> dict:
+    '''
+    Matches gif file stems to hits of a character
+
+    Returns:
+        stem -> (move, hit) for every stem that could be matched
+    '''
+    candidates = {(move, hit.name): words(f'{move} {hit.name}')
+                  for move in data.movesets.get(char, ()) for hit in data.move(char, move)}
+    matched = {}
+    # e.g. https://raw.githubusercontent.com/.../data/images/Krystal/Slowmo/dsmash.gif?raw=true
+    for move in data.movesets.get(char, ()):
+        for hit in data.move(char, move):
+            for url in (hit.fullspeed, hit.slowmo):
+                found = re.search(r'/images/[^/]+/[^/]+/([^/?]+)\.gif', unquote(url or ''))
+                if found and found.group(1) in stems:
+                    matched[found.group(1)] = (move, hit.name)
+    matched.update((stem, tuple(target)) for stem, target in overrides.items() if stem in stems)
+    taken = set(matched.values())
+
+    # Best pairs first, each file and hit used once
+    pairs = sorted(((score(words(stem), hit_words), stem, target)
+                    for stem in stems if stem not in matched
+                    for target, hit_words in candidates.items() if target not in taken),
+                   key=lambda pair: -pair[0])
+    for value, stem, target in pairs:
+        if value < MIN_SCORE:
+            break
+        if stem in matched or target in taken:
+            continue
+        # Two hits fitting a file equally well is a guess, leave it for the overrides
+        rivals = [v for v, s, t in pairs if s == stem and t != target and t not in taken and v == value]
+        if rivals:
+            continue
+        matched[stem] = target
+        taken.add(target)
+    return matched
+
+
+def build(data: FrameDataStore = None, images: Path = IMAGES_DIR, out: Path = MEDIA_DIR) -> dict:
+    '''Writes the object store and manifest, returns the manifest'''
+    data = data or FrameDataStore().load()
+    images, out = Path(images), Path(out)
+    overrides_path = images / 'overrides.json'
+    overrides = json.loads(overrides_path.read_text()) if overrides_path.exists() else {}
+
+    objects = {}
+    hits = {}
+    unmapped = []
+    for char_dir in sorted(p for p in images.iterdir() if p.is_dir()):
+        char = char_dir.name
+        for speed in SPEEDS:
+            files = sorted((char_dir / speed).glob('*.gif'))
+            matched = match_files(data, char, [f.stem for f in files], overrides.get(char, {}))
+            for path in files:
+                raw = path.read_bytes()
+                digest = hashlib.sha256(raw).hexdigest()
+                if digest not in objects:
+                    objects[digest] = dict(gif_info(raw)._asdict(), size=len(raw), sources=[])
+                    store_object(path, out / 'objects' / digest[:2] / f'{digest}.gif')
+                objects[digest]['sources'].append(str(path.relative_to(images)))
+
+                if path.stem in matched:
+                    move, hit = matched[path.stem]
+                    hits.setdefault(char, {}).setdefault(move, {}).setdefault(hit, {})[speed] = digest
+                else:
+                    unmapped.append(str(path.relative_to(images)))
+
+    groups = {}
+    for digest, info in objects.items():
+        groups.setdefault((info['width'], info['height'], info['frames'], info['duration_ms']), []).append(digest)
+    manifest = {
+        'version': 1,
+        'objects': objects,
+        'hits': hits,
+        'likely_duplicates': [digests for digests in groups.values() if len(digests) > 1],
+        'unmapped': unmapped,
+    }
+    out.mkdir(parents=True, exist_ok=True)
+    tmp = out / f'{MANIFEST_NAME}.tmp'
+    tmp.write_text(json.dumps(manifest, indent=4))
+    os.replace(tmp, out / MANIFEST_NAME)
+    return manifest
+
+
+def store_object(source: Path, target: Path):
+    if target.exists():
+        return
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:  # another filesystem, or links aren't supported
+        shutil.copyfile(source, target)
+
+
+class MediaStore:
+    '''
+    MediaStore
+
+        Looks up the local gif of a hit in a built manifest. An empty store is used when
+        no manifest has been built, so every lookup returns None.
+    '''
+
+    def __init__(self, root: Path = MEDIA_DIR):
+        self.root = Path(root)
+        self.objects = {}
+        self.hits = {}
+
+    def load(self):
+        path = self.root / MANIFEST_NAME
+        if path.exists():
+            manifest = json.loads(path.read_text())
+            self.objects = manifest['objects']
+            self.hits = manifest['hits']
+        return self
+
+    def asset(self, char: str, move: str, hit: str, slowmo: bool = False) -> Optional[Asset]:
+        digest = self.hits.get(char, {}).get(move, {}).get(hit, {}).get(SPEEDS[slowmo])
+        if digest is None:
+            return None
+        return Asset(digest, self.root / 'objects' / digest[:2] / f'{digest}.gif', self.objects[digest])
+
+    def __len__(self):
+        return len(self.objects)
+
+
+if __name__ == '__main__':
+    manifest = build()
+    objects = manifest['objects']
+    sources = sum(len(info['sources']) for info in objects.values())
+    size = sum(info['size'] for info in objects.values())
+    mapped = sum(len(speeds) for moves in manifest['hits'].values() for hits in moves.values() for speeds in hits.values())
+    print(f'{sources} gifs, {len(objects)} distinct ({sources - len(objects)} exact duplicates), {size / 1e6:.1f} MB stored')
+    print(f'{mapped} hit/speed pairs mapped, {len(manifest["unmapped"])} files unmapped\n')
+
+    print('Likely duplicates (same size, frames and duration):')
+    for digests in manifest['likely_duplicates']:
+        print('    ' + '  =  '.join(src for d in digests for src in objects[d]['sources']))
+    if manifest['unmapped']:
+        print('\nUnmapped, add them to data/images/overrides.json:')
+        for path in manifest['unmapped']:
+            print(f'    {path}')
@@ -0,0 +1,156 @@
+'''
+discord.py cache settings and the memory they cost
+
+    cache_options() returns the intents and cache arguments bot.py creates the bot with. In
+    low-memory mode (SSF2_LOW_MEMORY=1) the members intent is off, so no guild is chunked, no
+    member or user is cached and no messages are kept. Nothing the bot does needs them; /about
+    counts users from guild.member_count, which every guild has either way.
+
+    cache_report() measures the objects held by a client's caches, grouped by type. An object
+    reachable from several caches is counted once, under the first type that reaches it (a
+    member's user is counted under User).
+
+    `python -m utils.memory` connects to the stand-in gateway of utils.gateway once in each
+    mode and prints both reports side by side:
+
+        --guilds 200 --members 500   size of the fake bot
+'''
+import collections
+import sys
+import types
+import weakref
+
+import discord
+
+# Not part of any one cached object, everything links back to these
+_SHARED = (discord.Client, discord.state.ConnectionState, discord.http.HTTPClient,
+           type, types.ModuleType, types.FunctionType, types.MethodType, weakref.ref)
+
+
+def cache_options(low_memory: bool) -> dict:
+    intents = discord.Intents.default()
+    intents.members = not low_memory
+    if low_memory:
+        return {
+            'intents': intents,
+            'member_cache_flags': discord.MemberCacheFlags.none(),
+            'chunk_guilds_at_startup': False,
+            'max_messages': None,
+        }
+    return {'intents': intents}
+
+
+def deep_sizeof(obj, seen: set, stop: tuple = ()) -> int:
+    '''
+    Bytes of an object and everything it references that isn't in seen, which it updates
+
+    References to instances of the stop types aren't followed.
+    '''
+    root = obj
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _SHARED) or (obj is not root and isinstance(obj, stop)):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset, collections.deque)):
+            stack.extend(obj)
+        elif isinstance(obj, (str, bytes, int, float, bool)) or obj is None:
+            continue
+        else:
+            if hasattr(obj, '__dict__'):
+                stack.append(obj.__dict__)
+            for cls in type(obj).__mro__:
+                for slot in getattr(cls, '__slots__', ()):
+                    try:
+                        stack.append(getattr(obj, slot))
+                    except AttributeError:
+                        pass
+    return size
+
+
+def cache_report(client: discord.Client) -> list:
+    '''
+    Returns:
+        (type, count, bytes) for every kind of cached object
+    '''
+    state = client._connection
+    guilds = list(state._guilds.values())
+    caches = [
+        ('User', list(state._users.values())),
+        ('Member', [m for g in guilds for m in g._members.values()]),
+        ('Channel', [c for g in guilds for c in g._channels.values()] + list(state._private_channels.values())),
+        ('Thread', [t for g in guilds for t in g._threads.values()]),
+        ('Role', [r for g in guilds for r in g._roles.values()]),
+        ('Emoji', list(state._emojis.values()) + list(state._stickers.values())),
+        ('Message', list(state._messages or ())),
+        ('Guild', guilds),  # last, so it only counts what isn't in the caches above
+    ]
+    seen = set()
+    report = []
+    for name, objects in caches:
+        # Everything links to its guild, which is measured on its own
+        stop = () if name == 'Guild' else (discord.Guild,)
+        report.append((name, len(objects), sum(deep_sizeof(obj, seen, stop) for obj in objects)))
+    return report
+
+
+def format_report(report: list) -> list:
+    lines = [f'{"type":<10}{"count":>10}{"KiB":>12}{"B/object":>10}']
+    for name, count, size in report:
+        lines.append(f'{name:<10}{count:>10,}{size / 1024:>12,.1f}{size // count if count else 0:>10,}')
+    lines.append(f'{"total":<10}{sum(r[1] for r in report):>10,}{sum(r[2] for r in report) / 1024:>12,.1f}')
+    return lines
+
+
+if __name__ == '__main__':
+    import argparse
+    import asyncio
+    import time
+
+    import yarl
+    from discord.gateway import DiscordWebSocket
+
+    from utils.gateway import StandInGateway
+
+    parser = argparse.ArgumentParser(description='Compare the cache memory of normal and low-memory mode')
+    parser.add_argument('--guilds', type=int, default=200)
+    parser.add_argument('--members', type=int, default=500, help='average members per guild')
+    parser.add_argument('--port', type=int, default=8766)
+    args = parser.parse_args()
+
+    class Client(discord.AutoShardedClient):
+        async def on_ready(self):
+            self.ready.set()
+
+    async def measure(low_memory: bool):
+        client = Client(shard_count=1, **cache_options(low_memory))
+        client.ready = asyncio.Event()
+        start = time.perf_counter()
+        task = asyncio.create_task(client.start('stand-in'))
+        await asyncio.wait_for(client.ready.wait(), 300)
+        elapsed = time.perf_counter() - start
+        report = cache_report(client)
+        await client.close()
+        await task
+        return report, elapsed
+
+    async def main():
+        gateway = StandInGateway(1, args.guilds, args.members, port=args.port)
+        discord.http.Route.BASE = f'{gateway.url}/api/v10'
+        DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(f'ws://{gateway.host}:{gateway.port}')
+        await gateway.start()
+        try:
+            for low_memory in (False, True):
+                report, elapsed = await measure(low_memory)
+                print(f'\n{"Low-memory" if low_memory else "Normal"} mode, ready in {elapsed:.2f} s')
+                print('\n'.join(format_report(report)))
+        finally:
+            await gateway.stop()
+
+    asyncio.run(main())
@@ -0,0 +1,172 @@
+'''
+Local mirror of hot-linked media
+
+    Every embed image and icon is an imgur (or github) url. `python -m utils.mirror` fetches
+    every url referenced by the data files into data/mirror/, so an image that imgur removes
+    can still be sent as an attachment:
+        files/ab/abcdef....gif   one file per distinct sha256
+        index.json               url -> file, ETag, Last-Modified, status, consecutive failures
+
+    All requests share one aiohttp session, with at most `concurrency` connections open. Urls
+    that were fetched before are requested with If-None-Match / If-Modified-Since, so a run
+    where nothing changed downloads almost nothing. imgur answers a removed image with a
+    redirect to removed.png instead of a 404, both count as dead. utils.imagehost is a local
+    stand-in for imgur to run it against, `python -m utils.imagehost --check`.
+'''
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from utils.framedata import DATA_DIR
+
+MIRROR_DIR = DATA_DIR / 'mirror'
+INDEX_NAME = 'index.json'
+MAX_FAILURES = 3  # consecutive errors before the cached copy is used instead of the url
+
+_URL = re.compile(r'''https?://[^\s'"<>]+''')
+
+
+def referenced_urls(root: Path = DATA_DIR) -> list:
+    '''Every url in characters.json, stats/stats.json, info/*.json and ssf2.py'''
+    root = Path(root)
+    paths = [root / 'characters.json', root / 'stats' / 'stats.json', root / 'ssf2.py']
+    paths += sorted((root / 'info').glob('*.json'))
+    urls = set()
+    for path in paths:
+        if path.exists():
+            urls.update(_URL.findall(path.read_text(encoding='utf-8')))
+    return sorted(urls)
+
+
+class Mirror:
+    def __init__(self, root: Path = MIRROR_DIR):
+        self.root = Path(root)
+        self.entries = {}  # url -> {'file', 'etag', 'last_modified', 'status', 'failures', 'checked'}
+
+    def load(self):
+        path = self.root / INDEX_NAME
+        if path.exists():
+            self.entries = json.loads(path.read_text())
+        return self
+
+    def save(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / f'{INDEX_NAME}.{os.getpid()}.tmp'
+        tmp.write_text(json.dumps(self.entries, indent=4))
+        os.replace(tmp, self.root / INDEX_NAME)
+
+    def path(self, url: str) -> Optional[Path]:
+        entry = self.entries.get(url)
+        if not entry or not entry.get('file'):
+            return None
+        path = self.root / 'files' / entry['file']
+        return path if path.exists() else None
+
+    def frozen(self) -> 'Mirror':
+        '''A copy of the index that later syncs of this mirror don't change'''
+        copy = Mirror(self.root)
+        copy.entries = {url: dict(entry) for url, entry in self.entries.items()}
+        return copy
+
+    def failing(self, url: str) -> bool:
+        '''Whether a url is dead or keeps failing'''
+        entry = self.entries.get(url)
+        return bool(entry) and (entry['status'] == 'dead' or entry.get('failures', 0) >= MAX_FAILURES)
+
+    def fallback(self, url: str) -> Optional[Path]:
+        '''The cached copy of a url that is dead or keeps failing, None while the url works'''
+        return self.path(url) if self.failing(url) else None
+
+    def dead(self) -> list:
+        return sorted(url for url, entry in self.entries.items() if entry['status'] == 'dead')
+
+    def store(self, url: str, body: bytes) -> str:
+        digest = hashlib.sha256(body).hexdigest()
+        suffix = Path(urlsplit(url).path).suffix or '.bin'
+        name = f'{digest[:2]}/{digest}{suffix}'
+        path = self.root / 'files' / name
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+            tmp.write_bytes(body)
+            os.replace(tmp, path)
+        return name
+
+    async def fetch(self, session: aiohttp.ClientSession, url: str) -> str:
+        '''Checks one url, returns what happened: new, updated, unchanged, dead or error'''
+        entry = self.entries.setdefault(url, {'file': None, 'status': 'new', 'failures': 0})
+        headers = {}
+        if entry.get('etag') and self.path(url):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified') and self.path(url):
+            headers['If-Modified-Since'] = entry['last_modified']
+        entry['checked'] = time.time()
+
+        try:
+            async with session.get(url, headers=headers) as response:
+                if response.status == 304:
+                    outcome = 'unchanged'
+                elif response.status in (404, 410) or response.url.path.endswith('/removed.png'):
+                    outcome = 'dead'
+                elif response.status == 200:
+                    body = await response.read()
+                    name = await asyncio.to_thread(self.store, url, body)
+                    outcome = 'new' if entry['file'] is None else 'unchanged' if name == entry['file'] else 'updated'
+                    entry['file'] = name
+                    entry['etag'] = response.headers.get('ETag')
+                    entry['last_modified'] = response.headers.get('Last-Modified')
+                else:
+                    raise aiohttp.ClientResponseError(response.request_info, response.history, status=response.status)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            entry['failures'] = entry.get('failures', 0) + 1
+            entry['error'] = str(e) or type(e).__name__
+            return 'error'
+
+        entry['status'] = 'dead' if outcome == 'dead' else 'ok'
+        entry['failures'] = 0
+        entry.pop('error', None)
+        return outcome
+
+    async def sync(self, urls, concurrency: int = 8, timeout: float = 30.0) -> dict:
+        '''
+        Fetches every url through one pooled session and saves the index
+
+        Returns:
+            outcome -> list of urls
+        '''
+        connector = aiohttp.TCPConnector(limit=concurrency)
+        session_timeout = aiohttp.ClientTimeout(total=timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=session_timeout) as session:
+            outcomes = await asyncio.gather(*(self.fetch(session, url) for url in urls))
+        await asyncio.to_thread(self.save)
+
+        report = {}
+        for url, outcome in zip(urls, outcomes):
+            report.setdefault(outcome, []).append(url)
+        return report
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Mirror every media url in the data files')
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    urls = referenced_urls()
+    start = time.perf_counter()
+    mirror = Mirror().load()
+    report = asyncio.run(mirror.sync(urls, args.concurrency))
+    print(f'Checked {len(urls)} urls in {time.perf_counter() - start:.1f} s: '
+          + ', '.join(f'{len(found)} {outcome}' for outcome, found in sorted(report.items())))
+    for outcome in ('dead', 'error'):
+        for url in report.get(outcome, ()):
+            print(f'    {outcome}: {url} {mirror.entries[url].get("error", "")}')
@@ -0,0 +1,97 @@
+'''
+Punish finder
+
+    A move can be punished by anything that becomes active before its endlag is over.
+    PunishTable keeps one option per (character, move), its earliest first active frame,
+    sorted by character and then startup. The options of every character fast enough for a
+    window are then a single searchsorted over the whole roster:
+
+        key = character id * STRIDE + startup
+        end of each character's options = searchsorted(keys, character ids * STRIDE + window)
+
+    so a query costs O(characters * log(options)) no matter how many moves there are.
+'''
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from utils.query import FrameTable
+
+# Slots that can't be used as a punish
+EXCLUDED = ('Taunt', 'Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw')
+STRIDE = 1 << 16  # larger than any frame number
+
+
+class Option(NamedTuple):
+    move: str
+    startup: int
+    margin: int  # frames to spare
+
+
+class Punish(NamedTuple):
+    window: Optional[int]  # endlag frames of the punished move, None when unknown
+    hit: Optional[str]     # the hit the window was taken from
+    punishers: tuple       # (character, tuple of Option fastest first), best margin first
+
+
+class PunishTable:
+    def __init__(self, table: FrameTable):
+        self.table = table
+        startup = table.columns['startup']
+        keep = ~np.isnan(startup) & ~np.isin(table.move, [i for i, move in enumerate(table.moves) if move in EXCLUDED])
+        rows = np.flatnonzero(keep)
+
+        # Earliest startup of each (character, move): sort by pair then startup, keep the first of each pair
+        pair = table.char[rows].astype(np.int64) * len(table.moves) + table.move[rows]
+        rows = rows[np.lexsort((startup[rows], pair))]
+        pair = table.char[rows].astype(np.int64) * len(table.moves) + table.move[rows]
+        first = np.ones(len(rows), dtype=bool)
+        first[1:] = pair[1:] != pair[:-1]
+        rows = rows[first]
+
+        # Then by character and startup for the searches
+        rows = rows[np.lexsort((table.move[rows], startup[rows], table.char[rows]))]
+        self.rows = rows
+        self.char = table.char[rows].astype(np.int64)
+        self.startup = startup[rows].astype(np.int64)
+        self.keys = self.char * STRIDE + self.startup
+        self.char_ids = np.arange(len(table.characters), dtype=np.int64)
+        self.starts = np.searchsorted(self.keys, self.char_ids * STRIDE)
+        # Plain lists for building the results, indexing numpy arrays one item at a time is slow
+        self.option_moves = [table.moves[move_id] for move_id in table.move[rows].tolist()]
+        self.option_startups = self.startup.tolist()
+
+    def window(self, char: str, move: str):
+        '''(endlag frames, hit name) of the hit of a move with the longest endlag'''
+        best = (None, None)
+        for record in self.table.data.records.get((char, move), ()):
+            if record.endlag and (best[0] is None or record.endlag > best[0]):
+                best = (record.endlag, record.hit)
+        return best
+
+    def punishers(self, window: int, per_character: int = None) -> tuple:
+        '''
+        Every character with an option whose startup fits in the window, best margin first
+
+        Only the per_character fastest options of each character are returned when it is set
+        '''
+        ends = np.searchsorted(self.keys, self.char_ids * STRIDE + window, side='right')
+        if per_character is not None:
+            ends = np.minimum(ends, self.starts + per_character)
+        moves, startups = self.option_moves, self.option_startups
+        starts, ends = self.starts.tolist(), ends.tolist()
+        found = []
+        for char_id in np.flatnonzero(np.array(ends) > self.starts).tolist():
+            options = tuple(
+                Option(moves[i], startups[i], window - startups[i])
+                for i in range(starts[char_id], ends[char_id])
+            )
+            found.append((self.table.characters[char_id], options))
+        found.sort(key=lambda item: (-item[1][0].margin, item[0]))
+        return tuple(found)
+
+    def punish(self, char: str, move: str, per_character: int = None) -> Punish:
+        window, hit = self.window(char, move)
+        if window is None:
+            return Punish(None, None, ())
+        return Punish(window, hit, self.punishers(window, per_character))
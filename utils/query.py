@@ -0,0 +1,201 @@
+'''
+Cross-roster frame data queries
+
+    FrameTable lays every HitRecord of the store out as NumPy columns, one row per hit.
+    A query like `startup<=5 damage>=10 angle between 250 290 move:aerial` becomes a
+    boolean mask per filter, and the answer is the rows where every mask is set.
+'''
+import re
+
+import numpy as np
+
+from utils.framedata import FrameDataStore
+from utils.hitdata import OPEN_END
+from utils.schema import HitFields, field_name
+
+# Numeric columns and the names users can type for them
+COLUMNS = ('startup', 'endlag', 'total', 'damage', 'angle', 'landinglag')
+ALIASES = {
+    'start': 'startup', 'firstactive': 'startup', 'frame': 'startup',
+    'lag': 'endlag',
+    'duration': 'total', 'faf': 'total',
+    'dmg': 'damage', '%': 'damage',
+    'landing': 'landinglag',
+}
+
+# Words that select a group of move slots
+MOVE_GROUPS = {
+    'aerial': ('Neutral Air', 'Forward Air', 'Back Air', 'Up Air', 'Down Air', 'Z Aerial'),
+    'tilt': ('Forward Tilt', 'Up Tilt', 'Down Tilt'),
+    'smash': ('Forward Smash', 'Up Smash', 'Down Smash'),
+    'special': ('Neutral Special', 'Side Special', 'Up Special', 'Down Special'),
+    'throw': ('Forward Throw', 'Back Throw', 'Up Throw', 'Down Throw'),
+    'nair': ('Neutral Air',), 'fair': ('Forward Air',), 'bair': ('Back Air',),
+    'uair': ('Up Air',), 'dair': ('Down Air',), 'zair': ('Z Aerial',),
+    'ftilt': ('Forward Tilt',), 'utilt': ('Up Tilt',), 'dtilt': ('Down Tilt',),
+    'fsmash': ('Forward Smash',), 'usmash': ('Up Smash',), 'dsmash': ('Down Smash',),
+    'nspecial': ('Neutral Special',), 'sspecial': ('Side Special',),
+    'uspecial': ('Up Special',), 'dspecial': ('Down Special',),
+}
+
+_OPERATORS = {
+    '<=': np.less_equal, '>=': np.greater_equal, '<': np.less, '>': np.greater,
+    '=': np.equal, '==': np.equal, '!=': np.not_equal,
+}
+_GLUE = re.compile(r'\s*(<=|>=|!=|==|=|<|>|:)\s*')
+_COMPARISON = re.compile(r'([a-z%]+)(<=|>=|!=|==|=|<|>)(-?\d+(?:\.\d+)?)')
+_NUMBER = re.compile(r'-?\d+(?:\.\d+)?')
+_NAMED = ('char:', 'character:', 'move:', 'has:')
+
+
+class QueryError(Exception):
+    pass
+
+
+def normalize(name: str) -> str:
+    return re.sub(r'[^a-z0-9]', '', name.lower())
+
+
+class FrameTable:
+    '''
+    FrameTable
+
+        records:    every HitRecord, in row order
+        characters: character names, indexed by the char column
+        moves:      move names, indexed by the move column
+        columns:    column name -> float32 array, nan where the value is unknown
+        fields:     HitFields, every field of every row under its canonical name
+
+        startup is the first active frame, endlag the number of endlag frames and
+        total the last frame of the move.
+    '''
+
+    def __init__(self, data: FrameDataStore):
+        self.data = data
+        self.records = [record for move_records in data.records.values() for record in move_records]
+        self.fields = HitFields(self.records)
+        self.characters = list(data.movesets)
+        self.moves = sorted({record.move for record in self.records}, key=lambda m: (data.moves.get(m, 99), m))
+
+        char_ids = {char: i for i, char in enumerate(self.characters)}
+        move_ids = {move: i for i, move in enumerate(self.moves)}
+        self.char = np.fromiter((char_ids[r.char] for r in self.records), dtype=np.int16, count=len(self.records))
+        self.move = np.fromiter((move_ids[r.move] for r in self.records), dtype=np.int16, count=len(self.records))
+
+        def column(values):
+            return np.fromiter(values, dtype=np.float32, count=len(self.records))
+
+        def landing_lag(record):
+            window = record.window('Landing Lag')
+            return window[-1][1] if window and window[-1][1] != OPEN_END else 0
+
+        self.columns = {
+            'startup': column(r.first_active for r in self.records),
+            'endlag': column(r.endlag for r in self.records),
+            'total': column(r.last_frame for r in self.records),
+            'damage': column(r.damage for r in self.records),
+            'angle': column(r.angle for r in self.records),
+            'landinglag': column(landing_lag(r) for r in self.records),
+        }
+        # 0 means unknown for the frame columns, nan never matches a comparison
+        for name in ('startup', 'endlag', 'total', 'landinglag'):
+            self.columns[name][self.columns[name] == 0] = np.nan
+
+    def __len__(self):
+        return len(self.records)
+
+    def names_matching(self, names: list, text: str, groups: dict = None) -> np.ndarray:
+        '''Ids of the names matching a group keyword or containing the text'''
+        wanted = normalize(text)
+        if groups and wanted in groups:
+            return np.array([i for i, name in enumerate(names) if name in groups[wanted]], dtype=np.int16)
+        return np.array([i for i, name in enumerate(names) if wanted in normalize(name)], dtype=np.int16)
+
+    def characters_matching(self, text: str) -> np.ndarray:
+        '''Id of the character with any of its names ('dk', 'zss'), else of those containing the text'''
+        found = self.data.registry.get(text)
+        if found and found.info in self.characters:
+            return np.array([self.characters.index(found.info)], dtype=np.int16)
+        return self.names_matching(self.characters, text)
+
+    def search(self, query: str):
+        '''
+        Runs a query
+
+        Returns:
+            (row indices, sort column) with rows ordered by the first numeric filter
+        Raises:
+            QueryError if the query can't be understood
+        '''
+        tokens = _GLUE.sub(r'\1', query.lower()).split()
+        if not tokens:
+            raise QueryError('Empty query, try something like `startup<=5 move:aerial`')
+
+        mask = np.ones(len(self.records), dtype=bool)
+        sort_by = None
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            comparison = _COMPARISON.fullmatch(token)
+            if token.startswith(_NAMED):
+                kind, text = token.split(':', 1)
+                # Allow multi-word names like move:neutral air
+                while i + 1 < len(tokens) and not self._starts_filter(tokens, i + 1):
+                    i += 1
+                    text += ' ' + tokens[i]
+                if kind == 'has':
+                    # has:intangibility, has:ledge snap, any spelling of a field
+                    field = field_name(text)
+                    if field is None:
+                        raise QueryError(f'No field is called `{text}`')
+                    mask &= self.fields.present(field)
+                else:
+                    if kind == 'move':
+                        ids = self.names_matching(self.moves, text, MOVE_GROUPS)
+                        mask &= np.isin(self.move, ids)
+                    else:
+                        ids = self.characters_matching(text)
+                        mask &= np.isin(self.char, ids)
+                    if not len(ids):
+                        raise QueryError(f'No {kind} matches `{text}`')
+            elif comparison:
+                field, op, value = comparison.groups()
+                field = self.column_name(field)
+                mask &= _OPERATORS[op](self.columns[field], float(value))
+                sort_by = sort_by or field
+            elif i + 1 < len(tokens) and tokens[i + 1] == 'between':
+                field = self.column_name(token)
+                # 'angle between 250 290' or 'angle between 250 and 290'
+                bounds = tokens[i + 2:i + 5]
+                if len(bounds) == 3 and bounds[1] == 'and':
+                    bounds = [bounds[0], bounds[2]]
+                    i += 4
+                else:
+                    bounds = bounds[:2]
+                    i += 3
+                if len(bounds) < 2 or not all(_NUMBER.fullmatch(b) for b in bounds):
+                    raise QueryError(f'`{token} between` needs two numbers')
+                low, high = sorted(map(float, bounds))
+                values = self.columns[field]
+                mask &= (values >= low) & (values <= high)
+                sort_by = sort_by or field
+            else:
+                raise QueryError(f'Unknown filter `{token}`, try something like `startup<=5 damage>=10`')
+            i += 1
+
+        rows = np.flatnonzero(mask)
+        if sort_by:
+            rows = rows[np.argsort(self.columns[sort_by][rows], kind='stable')]
+        return rows, sort_by
+
+    def column_name(self, field: str) -> str:
+        field = ALIASES.get(field, field)
+        if field not in self.columns:
+            raise QueryError(f'Unknown field `{field}`, use one of: {", ".join(COLUMNS)}')
+        return field
+
+    @staticmethod
+    def _starts_filter(tokens: list, i: int) -> bool:
+        token = tokens[i]
+        return (token.startswith(_NAMED) or bool(_COMPARISON.fullmatch(token))
+                or (i + 1 < len(tokens) and tokens[i + 1] == 'between'))
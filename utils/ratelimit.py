@@ -0,0 +1,80 @@
+'''
+Token bucket rate limits
+
+    Every user and every guild gets a bucket per kind of interaction (slash commands and
+    buttons). A bucket holds up to `burst` tokens and refills at `rate` tokens a second; an
+    interaction takes one and is turned away while the bucket is empty. The user's bucket is
+    checked first, so one person spamming a button runs out long before their guild does.
+
+    A bucket left alone for burst / rate seconds is full again, which is the same as having
+    no bucket, so it is dropped. Buckets are kept in order of last use and expired from the
+    front on every take, which keeps memory bounded by the users active in the last few
+    seconds; maxsize caps it outright.
+'''
+import time
+from collections import OrderedDict
+
+# (kind, scope) -> (burst, tokens per second)
+LIMITS = {
+    ('command', 'user'): (5, 0.5),
+    ('command', 'guild'): (30, 5.0),
+    ('button', 'user'): (10, 2.0),
+    ('button', 'guild'): (60, 10.0),
+}
+
+
+class TokenBuckets:
+    def __init__(self, burst: float, rate: float, maxsize: int = 100_000):
+        self.burst = burst
+        self.rate = rate
+        self.idle = burst / rate
+        self.maxsize = maxsize
+        self.buckets = OrderedDict()  # key -> (tokens, last update), least recently used first
+
+    def take(self, key, now: float = None) -> float:
+        '''Takes a token, returns 0 when there was one and otherwise the seconds until there is'''
+        now = time.monotonic() if now is None else now
+        self.expire(now)
+        tokens, updated = self.buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        self.buckets[key] = (tokens, now)
+        if len(self.buckets) > self.maxsize:
+            self.buckets.popitem(last=False)
+        return wait
+
+    def expire(self, now: float):
+        while self.buckets:
+            key, (_, updated) = next(iter(self.buckets.items()))
+            if now - updated < self.idle:
+                break
+            del self.buckets[key]
+
+    def __len__(self):
+        return len(self.buckets)
+
+
+class RateLimits:
+    def __init__(self, limits: dict = LIMITS):
+        self.buckets = {key: TokenBuckets(burst, rate) for key, (burst, rate) in limits.items()}
+
+    def take(self, kind: str, user_id: int, guild_id: int = None, now: float = None) -> tuple:
+        '''
+        Returns:
+            (seconds to wait, 'user' or 'guild'), (0.0, None) when the interaction may go ahead
+        '''
+        wait = self.buckets[(kind, 'user')].take(user_id, now)
+        if wait:
+            return wait, 'user'
+        if guild_id is not None:
+            wait = self.buckets[(kind, 'guild')].take(guild_id, now)
+            if wait:
+                return wait, 'guild'
+        return 0.0, None
+
+    def stats(self) -> dict:
+        return {f'{kind} {scope} buckets': len(buckets) for (kind, scope), buckets in self.buckets.items()}
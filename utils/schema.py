@@ -0,0 +1,173 @@
+'''
+Canonical hit fields
+
+    The hits of data/info/*.json don't agree on field names, the same thing is written
+    'Intangible', 'Intangibility', 'Intangability' or 'Invincibility', 'Ledgesnap' or
+    'Ledge Snap', 'Armored' or 'Armour'. HitFields compiles every hit into one canonical
+    set of fields:
+        dense     the fields most hits have, one tuple per field with a value (or None) per row
+        overflow  row -> {field: value} for rare fields, and for keys that aren't a field at
+                  all like 'Frames 1-20', which keep their raw name
+
+    Names are matched after dropping case, spaces and punctuation ('Ledgesnap' is
+    'Ledge Snap'), then through SPELLINGS for the ones that are spelled differently.
+    `python -m utils.schema` prints the diagnostics: the spellings each field was found
+    under, hits that use two spellings of one field, and keys that match no field.
+'''
+import difflib
+import re
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+
+# Canonical fields, with the spellings that normalizing case and spaces doesn't catch
+SPELLINGS = {
+    'Startup': (), 'Active': (), 'Endlag': (), 'Landing Lag': (), 'Autocancel': (),
+    'Damage': (), 'Sweetspot Damage': (), 'Sourspot Damage': (), 'Tipper Damage': (),
+    'Early Hit Damage': (), 'Late Hit Damage': (), 'Close Hit Damage': (), 'Self Damage': (),
+    'Angle': ('Angles',), 'Tipper Angle': (), 'Sourspot Angle': (),
+    'Intangible': ('Intangibility', 'Intangability', 'Invincibility', 'Invulnerable', 'Invulnerability'),
+    'Armor': ('Armored', 'Armour'),
+    'Ledge Snap': (), 'Ledge Grab': (),
+    'FAF': ('IASA',),
+    'Actionable': (), 'Cancellable': (), 'Cooldown': (), 'Duration': (), 'Total Duration': (),
+    'Max Charge': (), 'Sleep Timer': (), 'Stun Timer': (), 'Trap Time': (), 'Conditions': (),
+    'Notes': (),
+}
+DENSE_MIN = 0.02  # share of hits a field needs to get a dense column
+
+
+def normalize(name: str) -> str:
+    return re.sub(r'[^a-z0-9]', '', name.lower())
+
+
+# Normalized spelling -> canonical field
+FIELD_NAMES = {normalize(spelling): field for field, spellings in SPELLINGS.items()
+               for spelling in (field, *spellings)}
+
+
+@lru_cache(maxsize=1024)
+def field_name(name: str):
+    '''The canonical field of any spelling, None for a key that isn't a known field'''
+    return FIELD_NAMES.get(normalize(name))
+
+
+def canonical(raw: dict) -> dict:
+    '''
+    One hit's fields under their canonical names, the raw dict itself when it already uses them
+
+    Keys that aren't a field keep their name, and like in HitFields the first spelling of a
+    field wins while a second one is kept under its raw name.
+    '''
+    if all(field_name(key) in (None, key) for key in raw):
+        return raw
+    fields = {}
+    for key, value in raw.items():
+        field = field_name(key) or key
+        fields[key if field in fields else field] = value
+    return fields
+
+
+class HitFields:
+    '''
+    HitFields
+
+        rows:     (character, move, hit) of every row, in the order of the records given
+        dense:    canonical field -> tuple of its value in every row, None where a hit doesn't have it
+        overflow: row -> {field: value}, for the sparse fields and unknown keys
+
+        spellings: canonical field -> Counter of the raw keys it was compiled from
+        unknown:   raw key -> rows using it, for keys that match no field
+        conflicts: (row, field, raw keys) where a hit spells one field more than one way
+    '''
+
+    def __init__(self, records: list, dense_min: float = DENSE_MIN):
+        self.rows = tuple((r.char, r.move, r.hit) for r in records)
+        self.spellings = {}
+        self.unknown = {}
+        self.conflicts = []
+
+        compiled = []
+        for row, record in enumerate(records):
+            fields = {}
+            seen = {}
+            for key, value in record.raw.items():
+                field = field_name(key)
+                if field is None:
+                    self.unknown.setdefault(key, []).append(row)
+                    field = key
+                else:
+                    self.spellings.setdefault(field, Counter())[key] += 1
+                if field in fields:
+                    # The first spelling wins, the other is kept under its raw name
+                    self.conflicts.append((row, field, (seen[field], key)))
+                    field = key
+                fields[field] = value
+                seen.setdefault(field, key)
+            compiled.append(fields)
+
+        counts = Counter(field for fields in compiled for field in fields)
+        self.dense_fields = tuple(field for field in SPELLINGS if counts[field] >= dense_min * len(records))
+        self.dense = {field: tuple(fields.get(field) for fields in compiled) for field in self.dense_fields}
+        self.overflow = {}
+        for row, fields in enumerate(compiled):
+            rest = {field: value for field, value in fields.items() if field not in self.dense}
+            if rest:
+                self.overflow[row] = rest
+
+    def __len__(self):
+        return len(self.rows)
+
+    def get(self, row: int, field: str):
+        if field in self.dense:
+            return self.dense[field][row]
+        return self.overflow.get(row, {}).get(field)
+
+    def fields(self, row: int) -> dict:
+        '''Every field of one row under its canonical name'''
+        fields = {field: column[row] for field, column in self.dense.items() if column[row] is not None}
+        fields.update(self.overflow.get(row, {}))
+        return fields
+
+    def present(self, field: str) -> np.ndarray:
+        '''Boolean mask of the rows that have a field'''
+        if field in self.dense:
+            return np.array([value is not None for value in self.dense[field]], dtype=bool)
+        mask = np.zeros(len(self.rows), dtype=bool)
+        mask[[row for row, fields in self.overflow.items() if field in fields]] = True
+        return mask
+
+    def diagnostics(self) -> list:
+        lines = [f'{len(self.rows)} hits, {len(self.dense_fields)} dense fields, '
+                 f'{len(self.overflow)} hits with overflow fields\n']
+        lines.append(f'{"field":<20}{"hits":>6}  {"store":<8}spellings')
+        for field in SPELLINGS:
+            spellings = self.spellings.get(field)
+            if not spellings:
+                continue
+            store = 'dense' if field in self.dense else 'sparse'
+            found = ', '.join(f'{key!r} x{count}' for key, count in spellings.most_common())
+            lines.append(f'{field:<20}{sum(spellings.values()):>6}  {store:<8}{found}')
+
+        if self.conflicts:
+            lines.append('\nHits with two spellings of one field (the second is kept under its own name):')
+            for row, field, keys in self.conflicts:
+                lines.append(f'    {" / ".join(self.rows[row])}: {field} as {" and ".join(map(repr, keys))}')
+        if self.unknown:
+            lines.append('\nKeys that match no field, kept in the overflow under their own name:')
+            for key, rows in sorted(self.unknown.items(), key=lambda item: -len(item[1])):
+                where = ', '.join(' / '.join(self.rows[row]) for row in rows[:3])
+                close = difflib.get_close_matches(key, SPELLINGS, n=1, cutoff=0.75)
+                hint = f', maybe {close[0]!r}' if close else ''
+                hint += ', has frame numbers in the name' if re.search(r'\d', key) else ''
+                lines.append(f'    {key!r} x{len(rows)} ({where}){hint}')
+        return lines
+
+
+if __name__ == '__main__':
+    from utils.framedata import FrameDataStore
+
+    data = FrameDataStore().load()
+    records = [record for move_records in data.records.values() for record in move_records]
+    print('\n'.join(HitFields(records).diagnostics()))
@@ -0,0 +1,186 @@
+'''
+Compiled frame data snapshot
+
+    `python -m utils.snapshot` compiles characters.json, moves.json, stats/stats.json and
+    every info/{char}.json into a single binary file, data/framedata.snapshot.
+
+    Layout (little endian):
+        header   magic, snapshot format version, Python/marshal version, document count,
+                 newest source mtime, sha256 of the source files, index offset and length,
+                 length and crc32 of everything after the header
+        index    document name -> (offset, length) of its section
+        sections one marshal blob per document
+
+    Every string is interned before it is written, so marshal stores repeated keys like
+    'Startup' or 'Hitboxes' once per section and they load back as shared interned objects.
+    Documents are decoded on demand through the index. A file whose body doesn't match the
+    length and checksum in its header (a truncated copy, a bad disk) is rejected on open.
+'''
+import hashlib
+import marshal
+import mmap
+import os
+import struct
+import sys
+import zlib
+from pathlib import Path
+
+FORMAT_VERSION = 2
+MAGIC = b'SSF2SNAP'
+SNAPSHOT_NAME = 'framedata.snapshot'
+
+# magic, format version, marshal version, python major, python minor, document count,
+# newest source mtime, source sha256, index offset, index length, body length, body crc32
+HEADER = struct.Struct('<8sHHBBHd32sQQQI')
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def source_files(root: Path) -> dict:
+    '''Document name -> path of every JSON file the snapshot is compiled from'''
+    files = {
+        'characters': root / 'characters.json',
+        'moves': root / 'moves.json',
+        'stats': root / 'stats' / 'stats.json',
+    }
+    for path in sorted((root / 'info').glob('*.json')):
+        files[f'info/{path.stem}'] = path
+    return files
+
+
+def source_digest(files: dict) -> bytes:
+    digest = hashlib.sha256()
+    for name, path in files.items():
+        digest.update(name.encode())
+        digest.update(b'\0')
+        digest.update(path.read_bytes())
+    return digest.digest()
+
+
+def newest_mtime(files: dict) -> float:
+    return max(path.stat().st_mtime for path in files.values())
+
+
+def _intern(value):
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, dict):
+        return {sys.intern(k): _intern(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_intern(v) for v in value]
+    return value
+
+
+def build(root: Path = Path('data'), output: Path = None) -> Path:
+    import json
+
+    root = Path(root)
+    output = Path(output) if output else root / SNAPSHOT_NAME
+    files = source_files(root)
+
+    sections = []
+    for name, path in files.items():
+        with open(path, 'r') as f:
+            sections.append((name, marshal.dumps(_intern(json.load(f)))))
+
+    index = {}
+    offset = 0
+    for name, blob in sections:
+        index[name] = (offset, len(blob))
+        offset += len(blob)
+    index_blob = marshal.dumps(index)
+
+    body = bytearray(index_blob)
+    for _, blob in sections:
+        body += blob
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, marshal.version, *sys.version_info[:2], len(sections),
+        newest_mtime(files), source_digest(files), HEADER.size, len(index_blob), len(body), zlib.crc32(body))
+
+    # Write next to the target and rename so a running bot never reads half a file,
+    # named per process so two builds never write the same temporary file
+    tmp = output.with_name(f'{output.name}.{os.getpid()}.tmp')
+    tmp.write_bytes(header + body)
+    tmp.replace(output)
+    return output
+
+
+class Snapshot:
+    '''
+    A memory-mapped snapshot
+
+        Raises SnapshotError if the file is missing, was built by another format or
+        Python version, or no longer matches the JSON it was compiled from.
+    '''
+
+    def __init__(self, root: Path = Path('data'), path: Path = None):
+        self.root = Path(root)
+        self.path = Path(path) if path else self.root / SNAPSHOT_NAME
+        try:
+            with open(self.path, 'rb') as f:
+                self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise SnapshotError(f'Cannot open {self.path}: {e}') from None
+
+        try:
+            self.parse_header()
+            self.check_fresh()
+        except SnapshotError:
+            self.close()
+            raise
+
+    def parse_header(self):
+        if len(self.mm) < HEADER.size:
+            raise SnapshotError(f'{self.path} is truncated')
+        magic, version = struct.unpack_from('<8sH', self.mm)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise SnapshotError(f'{self.path} is not a version {FORMAT_VERSION} snapshot')
+        (_, _, marshal_version, major, minor, self.count, self.mtime, self.digest,
+         index_at, index_len, body_len, crc) = HEADER.unpack_from(self.mm)
+        if (marshal_version, major, minor) != (marshal.version, *sys.version_info[:2]):
+            raise SnapshotError(f'{self.path} was built by Python {major}.{minor}')
+        body = memoryview(self.mm)[HEADER.size:]
+        try:
+            if len(body) != body_len or zlib.crc32(body) != crc:
+                raise SnapshotError(f'{self.path} is corrupt, its body does not match the checksum')
+        finally:
+            body.release()
+        self.sections_at = index_at + index_len
+        self.index = self.decode(index_at, index_len)
+
+    def check_fresh(self):
+        files = source_files(self.root)
+        if set(files) != set(self.index):
+            raise SnapshotError(f'{self.path} is stale, rebuild it with `python -m utils.snapshot`')
+        # Untouched files are trusted on mtime alone, anything newer has its content hashed
+        if newest_mtime(files) > self.mtime and source_digest(files) != self.digest:
+            raise SnapshotError(f'{self.path} is stale, rebuild it with `python -m utils.snapshot`')
+
+    def __contains__(self, name: str):
+        return name in self.index
+
+    def names(self):
+        return self.index.keys()
+
+    def read(self, name: str):
+        offset, length = self.index[name]
+        return self.decode(self.sections_at + offset, length)
+
+    def decode(self, start: int, length: int):
+        try:
+            return marshal.loads(self.mm[start:start + length])
+        except (EOFError, ValueError, TypeError) as e:
+            raise SnapshotError(f'{self.path} is corrupt: {e}') from None
+
+    def close(self):
+        self.mm.close()
+
+
+if __name__ == '__main__':
+    import time
+
+    start = time.perf_counter()
+    path = build()
+    print(f'Wrote {path} ({path.stat().st_size:,} bytes) in {(time.perf_counter() - start) * 1000:.1f} ms')
@@ -0,0 +1,144 @@
+'''
+Startup profiler
+
+    bot.py records every phase of its startup in a StartupProfile: imports, login, each cog,
+    the gateway connection up to READY and the preloads. Preloads (loading the frame data,
+    building the search index, warming the embed cache) run in threads, so the data is
+    built while login and the gateway connection are waiting on the network; commands that
+    need a preload wait for it. When the bot is ready it prints the report below and warns
+    when startup took longer than the budget (SSF2_STARTUP_BUDGET seconds, default 10).
+
+        phase                    start (ms)  time (ms)
+        imports                         0.0      612.4
+        login                         612.9      301.7
+          framedata (preload)         613.1       23.0
+        ...
+        ready                                   3154.2   budget 10000 ms
+
+    `python -m utils.startup` runs bot.py against the stand-in gateway of utils.gateway
+    --rounds times, prints the median of every phase and exits with 1 when the median
+    startup is over --budget, so the budget can be checked like any other benchmark. It
+    needs a KEYS.json, any values work against the stand-in.
+'''
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from typing import NamedTuple
+
+BUDGET = float(os.environ.get('SSF2_STARTUP_BUDGET', 10.0))
+
+
+class Phase(NamedTuple):
+    name: str
+    start: float      # seconds since the process started importing
+    duration: float
+    preload: bool     # ran in a thread alongside the other phases
+
+
+class StartupProfile:
+    def __init__(self, started: float = None, budget: float = BUDGET):
+        self.started = time.perf_counter() if started is None else started
+        self.budget = budget
+        self.phases = []
+        self.ready = None  # seconds until the bot was ready
+
+    def record(self, name: str, start: float, end: float = None, preload: bool = False):
+        end = time.perf_counter() if end is None else end
+        self.phases.append(Phase(name, start - self.started, end - start, preload))
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start)
+
+    async def preload(self, name: str, fn, *args):
+        '''Runs fn in a thread and records how long it took'''
+        def timed():
+            start = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                self.record(name, start, preload=True)
+        return await asyncio.to_thread(timed)
+
+    def mark_ready(self):
+        self.ready = time.perf_counter() - self.started
+
+    @property
+    def over_budget(self) -> bool:
+        return self.ready is not None and self.ready > self.budget
+
+    def report(self) -> list:
+        lines = [f'{"phase":<28}{"start (ms)":>11}{"time (ms)":>11}']
+        for phase in sorted(self.phases, key=lambda p: p.start):
+            name = f'  {phase.name} (preload)' if phase.preload else phase.name
+            lines.append(f'{name:<28}{phase.start * 1000:>11.1f}{phase.duration * 1000:>11.1f}')
+        if self.ready is not None:
+            status = 'OVER BUDGET' if self.over_budget else 'budget'
+            lines.append(f'{"ready":<28}{"":>11}{self.ready * 1000:>11.1f}   {status} {self.budget * 1000:.0f} ms')
+        return lines
+
+    def to_dict(self) -> dict:
+        return {'ready': self.ready, 'budget': self.budget, 'phases': [phase._asdict() for phase in self.phases]}
+
+
+async def profile_startup(gateway_url: str, timeout: float = 120.0) -> dict:
+    '''Starts bot.py against a stand-in gateway and returns its startup profile'''
+    report = f'startup-{os.getpid()}.json'
+    env = dict(os.environ, SSF2_API=gateway_url, SSF2_GATEWAY=gateway_url.replace('http', 'ws', 1),
+               SSF2_STARTUP_REPORT=report, SSF2_EXIT_AFTER_STARTUP='1')
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, 'bot.py', env=env, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+    try:
+        await asyncio.wait_for(process.wait(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        raise
+    try:
+        with open(report, 'r') as f:
+            return json.load(f)
+    finally:
+        if os.path.exists(report):
+            os.remove(report)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from utils.gateway import StandInGateway
+
+    parser = argparse.ArgumentParser(description='Profile the bot startup against a stand-in gateway')
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--budget', type=float, default=BUDGET, help='seconds')
+    parser.add_argument('--guilds', type=int, default=50)
+    parser.add_argument('--port', type=int, default=8767)
+    args = parser.parse_args()
+
+    if not os.path.exists('KEYS.json'):
+        sys.exit('bot.py needs a KEYS.json, e.g. {"TOKEN": "x", "COMMANDLOG": 0, "ERRORLOG": 0}')
+
+    async def main():
+        gateway = StandInGateway(1, args.guilds, port=args.port)
+        await gateway.start()
+        try:
+            return [await profile_startup(gateway.url) for _ in range(args.rounds)]
+        finally:
+            await gateway.stop()
+
+    runs = asyncio.run(main())
+    profile = StartupProfile(0.0, args.budget)
+    for name in dict.fromkeys(phase['name'] for phase in runs[0]['phases']):
+        found = [phase for run in runs for phase in run['phases'] if phase['name'] == name]
+        profile.phases.append(Phase(name, statistics.median(p['start'] for p in found),
+                                    statistics.median(p['duration'] for p in found), found[0]['preload']))
+    profile.ready = statistics.median(run['ready'] for run in runs)
+    print(f'Median of {len(runs)} startups, {args.guilds} guilds\n')
+    print('\n'.join(profile.report()))
+    sys.exit(1 if profile.over_budget else 0)
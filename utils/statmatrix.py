@@ -0,0 +1,141 @@
+'''
+Character stat matrix
+
+    StatMatrix compiles stats/stats.json into a characters x stats float array once per load,
+    along with everything /stats and /statcompare show about it: the roster average, each
+    character's difference from it, z-scores and roster percentiles.
+
+    Most stats are plain numbers. A few have a second form in parentheses, which becomes a
+    variant of the stat instead of breaking the parse:
+        '11.7 (14.5 KK)'      -> 11.7, variant KK = 14.5       (Goku's Kaioken)
+        '11, 17 (Discharge)'  -> 11, variant Discharge = 17    (Pichu)
+
+    The 'Average' entry of stats.json is only used for its embed info, the averages are
+    computed from the roster so they can't drift out of date.
+'''
+import re
+from typing import NamedTuple
+
+import numpy as np
+
+AVERAGE = 'Average'
+
+_NUMBER = r'-?\d+(?:\.\d+)?'
+_BASE = re.compile(_NUMBER)
+_VARIANT = re.compile(rf'(?:,\s*(?P<before>{_NUMBER})\s*)?\(\s*(?:(?P<inside>{_NUMBER})\s*)?(?P<label>[^()]*?)\s*\)')
+
+
+class StatLine(NamedTuple):
+    """One stat of one character, compared against the roster."""
+    stat: str
+    value: float
+    delta: float       # difference from the roster average
+    z: float           # delta in roster standard deviations
+    percentile: float  # share of the rest of the roster with a lower value, 0-100
+
+
+def parse_stat(text: str):
+    '''
+    Returns:
+        (value, {variant label: value}), value is nan when there is no number at all
+    '''
+    text = str(text)
+    variants = {}
+    for m in _VARIANT.finditer(text):
+        number = m.group('inside') or m.group('before')
+        if number is not None:
+            variants[m.group('label') or 'Alt'] = float(number)
+    base = _BASE.search(_VARIANT.sub('', text))
+    return (float(base.group()) if base else np.nan), variants
+
+
+class StatMatrix:
+    '''
+    StatMatrix
+
+        characters: roster names, one row each ('Average' is not a row)
+        fields:     stat names, one column each
+        values:     float64 characters x fields, nan where a stat is missing
+        average, std: per stat, over the roster
+        delta, z, percentile: same shape as values
+        variants:   (character, stat) -> tuple of (label, StatLine)
+        stat_lines: character -> tuple of StatLine, built once so a request is a lookup
+    '''
+
+    def __init__(self, stats: dict):
+        self.characters = tuple(char for char in stats if char != AVERAGE)
+        self.fields = tuple(dict.fromkeys(field for char in self.characters for field in stats[char]['Stats']))
+        self.rows = {char: i for i, char in enumerate(self.characters)}
+        self.columns = {field: j for j, field in enumerate(self.fields)}
+
+        self.values = np.full((len(self.characters), len(self.fields)), np.nan)
+        parsed_variants = {}
+        for char, i in self.rows.items():
+            for field, text in stats[char]['Stats'].items():
+                value, variants = parse_stat(text)
+                self.values[i, self.columns[field]] = value
+                if variants:
+                    parsed_variants[(char, field)] = variants
+
+        counts = np.sum(~np.isnan(self.values), axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.average = np.nansum(self.values, axis=0) / counts
+            self.std = np.sqrt(np.nansum((self.values - self.average) ** 2, axis=0) / counts)
+            self.delta = self.values - self.average
+            self.z = np.where(self.std > 0, self.delta / self.std, 0.0)
+        self.percentile = self.percentiles(self.values)
+
+        self.variants = {
+            (char, field): tuple(
+                (label, self.line(field, value, self.percentiles_of(field, value)))
+                for label, value in variants.items()
+            )
+            for (char, field), variants in parsed_variants.items()
+        }
+        self.stat_lines = {char: self._lines(char) for char in (*self.characters, AVERAGE)}
+
+    def percentiles(self, values: np.ndarray) -> np.ndarray:
+        '''Percentile of each value within its own column, ties share the middle rank'''
+        result = np.full(values.shape, np.nan)
+        for j in range(len(self.fields)):
+            column = self.values[:, j]
+            result[:, j] = self._percentile(np.sort(column[~np.isnan(column)]), values[:, j], self_included=True)
+        return result
+
+    def percentiles_of(self, field: str, value: float) -> float:
+        '''Percentile of a value that isn't in the roster, e.g. a variant form'''
+        column = self.values[:, self.columns[field]]
+        return float(self._percentile(np.sort(column[~np.isnan(column)]), np.array([value]), self_included=False)[0])
+
+    @staticmethod
+    def _percentile(ordered: np.ndarray, values: np.ndarray, self_included: bool) -> np.ndarray:
+        lower = np.searchsorted(ordered, values, side='left')
+        equal = np.searchsorted(ordered, values, side='right') - lower
+        others = len(ordered) - 1 if self_included else len(ordered)
+        if self_included:
+            equal = equal - 1  # don't count the character against itself
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result = (lower + equal / 2) / others * 100 if others > 0 else np.full(values.shape, 50.0)
+        return np.where(np.isnan(values), np.nan, result)
+
+    def line(self, field: str, value: float, percentile: float) -> StatLine:
+        j = self.columns[field]
+        delta = value - self.average[j]
+        z = delta / self.std[j] if self.std[j] > 0 else 0.0
+        return StatLine(field, value, float(delta), float(z), percentile)
+
+    def lines(self, char: str) -> tuple:
+        '''Every stat of a character, or the roster averages for 'Average' '''
+        return self.stat_lines[char]
+
+    def _lines(self, char: str) -> tuple:
+        if char == AVERAGE:
+            return tuple(StatLine(field, float(self.average[j]), 0.0, 0.0, 50.0) for field, j in self.columns.items())
+        i = self.rows[char]
+        return tuple(
+            StatLine(field, float(self.values[i, j]), float(self.delta[i, j]), float(self.z[i, j]), float(self.percentile[i, j]))
+            for field, j in self.columns.items()
+        )
+
+    def __contains__(self, char: str):
+        return char == AVERAGE or char in self.rows
@@ -0,0 +1,112 @@
+'''
+Synthetic frame data
+
+    `python -m utils.synthetic OUT --characters 300 --hits 6` writes a complete data folder
+    (characters.json, moves.json, stats/stats.json and info/*.json) to OUT, built from the
+    real characters so it has the same shape, field names and string formats.
+
+    Every synthetic character is a copy of a real one with its frame numbers shifted, so the
+    parsers see realistic but different strings. Moves with fewer than --hits hits get extra
+    copies of their hits, so the roster can be scaled to thousands of hits. Load it with
+    FrameDataStore(OUT) or pass --data OUT to `python -m utils.bench`.
+'''
+import json
+import random
+import re
+from pathlib import Path
+
+from utils.characters import normalize
+from utils.framedata import DATA_DIR
+
+_NUMBER = re.compile(r'\d+')
+
+
+def shifted(text: str, offset: int) -> str:
+    '''Adds the offset to every number in a frame string, e.g. "3-5" + 2 -> "5-7"'''
+    return _NUMBER.sub(lambda m: str(max(1, int(m.group()) + offset)), text)
+
+
+def synthetic_character(charinfo: dict, rng: random.Random, hits_per_move: int) -> dict:
+    result = {}
+    for move, moveinfo in charinfo.items():
+        offset = rng.randint(-2, 3)
+        hitboxes = {}
+        for hit, info in moveinfo['Hitboxes'].items():
+            info = dict(info)
+            for field in ('Startup', 'Active', 'Endlag'):
+                if field in info:
+                    info[field] = shifted(info[field], offset)
+            hitboxes[hit] = info
+        images = {speed: dict(gifs) for speed, gifs in moveinfo.get('Images', {}).items()}
+
+        # Pad with copies of the existing hits
+        originals = list(hitboxes.items())
+        copy = 2
+        while originals and len(hitboxes) < hits_per_move:
+            for hit, info in originals[:hits_per_move - len(hitboxes)]:
+                name = f'{hit} ({copy})'
+                hitboxes[name] = dict(info)
+                for gifs in images.values():
+                    if hit in gifs:
+                        gifs[name] = gifs[hit]
+            copy += 1
+
+        result[move] = dict(moveinfo, Hitboxes=hitboxes, Images=images)
+    return result
+
+
+def generate(out: Path, characters: int = 300, hits_per_move: int = 0, source: Path = DATA_DIR, seed: int = 0) -> dict:
+    '''Writes a synthetic data folder, returns counts of what was written'''
+    out, source = Path(out), Path(source)
+    rng = random.Random(seed)
+    with open(source / 'characters.json', 'r') as c:
+        real_characters = json.load(c)
+    with open(source / 'moves.json', 'r') as m:
+        moves = json.load(m)
+    with open(source / 'stats' / 'stats.json', 'r') as s:
+        real_stats = json.load(s)
+    templates = {}
+    for path in sorted((source / 'info').glob('*.json')):
+        with open(path, 'r') as f:
+            templates[path.stem] = json.load(f)
+
+    (out / 'info').mkdir(parents=True, exist_ok=True)
+    (out / 'stats').mkdir(exist_ok=True)
+    names = list(templates)
+    stats_names = {normalize(name): name for name in real_stats}
+    roster = {}
+    stats = {'Average': real_stats['Average']} if 'Average' in real_stats else {}
+    hits = 0
+    for i in range(characters):
+        template = names[i % len(names)]
+        name = f'{template} {i // len(names) + 1}'
+        charinfo = synthetic_character(templates[template], rng, hits_per_move)
+        hits += sum(len(moveinfo['Hitboxes']) for moveinfo in charinfo.values())
+        with open(out / 'info' / f'{name}.json', 'w') as f:
+            json.dump(charinfo, f, indent=4)
+        roster[name] = dict(real_characters.get(template, {'color': '000000', 'icon': ''}), id=i + 1)
+        # stats.json spells some names differently from the info files, e.g. Chibi-Robo
+        if normalize(template) in stats_names:
+            stats[name] = real_stats[stats_names[normalize(template)]]
+
+    with open(out / 'characters.json', 'w') as c:
+        json.dump(roster, c, indent=4)
+    with open(out / 'moves.json', 'w') as m:
+        json.dump(moves, m, indent=4)
+    with open(out / 'stats' / 'stats.json', 'w') as s:
+        json.dump(stats, s, indent=4)
+    return {'characters': characters, 'hits': hits}
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Write a synthetic frame data folder')
+    parser.add_argument('out', type=Path)
+    parser.add_argument('--characters', type=int, default=300)
+    parser.add_argument('--hits', type=int, default=0, help='pad every move to at least this many hits')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    counts = generate(args.out, args.characters, args.hits, seed=args.seed)
+    print(f'Wrote {counts["characters"]} characters / {counts["hits"]} hits to {args.out}')